@@ -1,67 +1,169 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+import click
 from config import Config
 from models import db
+from services.replicas import remember_writer
+from services.uploads import UploadRequest
 import os
 
-app = Flask(__name__)
-app.config.from_object(Config)
+# 앱 생성 (flask --app app run / gunicorn "app:create_app()")
+# config에 설정을 넘기면 덮어쓴다. 예) 테스트: create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+# import 할 때는 아무 일도 하지 않고, DB 연결도 첫 쿼리 때 만들어진다.
+def create_app(config=None):
+    app = Flask(__name__)
+    # 업로드 파일을 업로드 폴더의 임시 파일로 바로 받는다 (services/uploads.py)
+    app.request_class = UploadRequest
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
+    # SQLite(테스트/개발용)에는 커넥션 풀 크기 옵션을 쓸 수 없다
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
 
+    # CORS 설정 (React와 통신하기 위해)
+    CORS(app, origins=['http://localhost:3000'])
 
-# CORS 설정 (React와 통신하기 위해)
-CORS(app, origins=['http://localhost:3000'])
+    # JWT 설정
+    jwt = JWTManager(app)
+    register_jwt_handlers(jwt)
 
-# JWT 설정
-jwt = JWTManager(app)
+    # 데이터베이스 초기화 (스키마는 flask --app app db upgrade 또는 init-db 로 만든다)
+    db.init_app(app)
 
-# JWT 에러 핸들러 추가
-@jwt.unauthorized_loader
-def unauthorized_callback(callback):
-    return jsonify({
-        'message': '로그인이 필요합니다. (토큰 없음)'
-    }), 401
+    # 쓰기 요청을 한 사용자는 잠시 동안 읽기 복제본 대신 primary에서 읽는다
+    app.after_request(remember_writer)
 
-@jwt.invalid_token_loader
-def invalid_token_callback(callback):
-    return jsonify({
-        'message': '유효하지 않은 토큰입니다.'
-    }), 422
+    # Flask-Migrate(alembic)는 import가 무거우므로 flask 명령으로 실행될 때만 등록한다
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
-@jwt.expired_token_loader
-def expired_token_callback(jwt_header, jwt_payload):
-    return jsonify({
-        'message': '토큰이 만료되었습니다.'
-    }), 401
+    # 업로드 폴더는 한 번 절대 경로로 바꿔 둔다 (상대 경로는 앱 폴더 기준)
+    # 저장/작업/파일 응답이 모두 이 값을 쓰므로 실행 위치(cwd)와 상관없이 같은 폴더를 가리킨다.
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# 데이터베이스 초기화
-db.init_app(app)
+    register_blueprints(app)
+    register_commands(app)
 
-if not os.path.exists('uploads'):
-    os.makedirs('uploads')
+    return app
 
-from routes.auth import auth_bp
-from routes.images import images_bp
-from routes.comments import comments_bp
-from routes.reactions import reactions_bp
-from routes.users import users_bp
-from routes.notifications import notifications_bp
+# JWT 에러 핸들러
+def register_jwt_handlers(jwt):
+    @jwt.unauthorized_loader
+    def unauthorized_callback(callback):
+        return jsonify({
+            'message': '로그인이 필요합니다. (토큰 없음)'
+        }), 401
 
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(images_bp, url_prefix='/api/images')
-app.register_blueprint(comments_bp, url_prefix='/api/comments')
-app.register_blueprint(reactions_bp, url_prefix='/api/reactions')
-app.register_blueprint(users_bp, url_prefix='/api/users')
-app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+    @jwt.invalid_token_loader
+    def invalid_token_callback(callback):
+        return jsonify({
+            'message': '유효하지 않은 토큰입니다.'
+        }), 422
 
-@app.route('/')
-def index():
-    return {'message': 'Image Board API'}
+    @jwt.expired_token_loader
+    def expired_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'message': '토큰이 만료되었습니다.'
+        }), 401
 
-# 데이터베이스 테이블 생성
-with app.app_context():
-    db.create_all()
+def register_blueprints(app):
+    from routes.auth import auth_bp
+    from routes.images import images_bp
+    from routes.comments import comments_bp
+    from routes.reactions import reactions_bp
+    from routes.users import users_bp
+    from routes.notifications import notifications_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(images_bp, url_prefix='/api/images')
+    app.register_blueprint(comments_bp, url_prefix='/api/comments')
+    app.register_blueprint(reactions_bp, url_prefix='/api/reactions')
+    app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+
+    @app.route('/')
+    def index():
+        return {'message': 'Image Board API'}
+
+    # 응답 캐시 적중/미스/축출 통계
+    @app.route('/api/cache/stats')
+    def cache_stats():
+        from services.cache import get_cache
+        cache = get_cache()
+        return {'backend': app.config.get('CACHE_BACKEND'), 'stats': cache.stats() if cache else None}
+
+def register_commands(app):
+    # 모델 기준으로 테이블 생성 (flask --app app init-db, 개발/테스트용)
+    # 운영 DB는 flask --app app db upgrade 로 마이그레이션을 적용한다.
+    @app.cli.command('init-db')
+    def init_db_command():
+        """모델 기준으로 테이블을 만들고 마이그레이션 버전을 최신으로 표시"""
+        from flask_migrate import stamp
+        db.create_all()
+        stamp()
+        print('테이블 생성 완료')
+
+    # 카운터 재계산 (flask --app app repair-counters)
+    @app.cli.command('repair-counters')
+    def repair_counters_command():
+        """댓글 수/반응 수 카운터를 원본 데이터로 다시 계산"""
+        from services.counters import repair_counters
+        repair_counters()
+        print('카운터 재계산 완료')
+
+    # 기존 이미지 지각 해시 채우기 (flask --app app backfill-phash)
+    @app.cli.command('backfill-phash')
+    def backfill_phash_command():
+        """해시가 없는 이미지의 지각 해시(비슷한 이미지 조회용)를 계산"""
+        from services.similarity import backfill_hashes
+        filled = backfill_hashes(app.config['UPLOAD_FOLDER'])
+        print(f'지각 해시 {filled}개 계산 완료')
+
+    # 기존 이미지 자리 표시 정보 채우기 (flask --app app backfill-placeholders)
+    @app.cli.command('backfill-placeholders')
+    def backfill_placeholders_command():
+        """크기/blurhash/대표 색이 없는 이미지의 자리 표시 정보를 계산"""
+        from services.placeholders import backfill_placeholders
+        filled = backfill_placeholders(app.config['UPLOAD_FOLDER'])
+        print(f'자리 표시 정보 {filled}개 계산 완료')
+
+    # 이미지별 WebP/AVIF 변환 절감량 (flask --app app transcode-report)
+    @app.cli.command('transcode-report')
+    def transcode_report_command():
+        """이미지별 원본 대비 변환본 크기 절감량 출력"""
+        from models import Image
+        from services.transcode import parse_sizes, savings_report
+        total_original = total_saved = 0
+        for image in Image.query.filter(Image.transcoded_sizes.isnot(None)).order_by(Image.id):
+            report = savings_report(parse_sizes(image.transcoded_sizes))
+            if report is None:
+                continue
+            variants = ', '.join(f'{fmt} {size}' for fmt, size in report['variants'].items()) or '변환본 없음'
+            print(f"{image.id}\t{report['originalBytes']} -> {variants}\t"
+                  f"-{report['savedBytes']} ({report['savedPercent']}%)")
+            total_original += report['originalBytes']
+            total_saved += report['savedBytes']
+        percent = round(total_saved * 100 / total_original, 1) if total_original else 0.0
+        print(f'합계: 원본 {total_original} bytes, 절감 {total_saved} bytes ({percent}%)')
+
+    # 주요 쿼리 실행 계획 점검 (flask --app app explain-queries, 문제가 있으면 종료 코드 1)
+    @app.cli.command('explain-queries')
+    def explain_queries_command():
+        """주요 엔드포인트 쿼리가 인덱스를 쓰는지 EXPLAIN으로 확인"""
+        from services.query_plans import explain_hot_queries
+        failed = False
+        for name, plan, problems in explain_hot_queries():
+            print(f"[{'문제' if problems else 'OK'}] {name}")
+            for detail in plan:
+                print(f'    {detail}')
+            failed = failed or bool(problems)
+        if failed:
+            raise SystemExit(1)
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
@@ -8,7 +8,62 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 커넥션 풀 (pool_recycle은 MySQL wait_timeout보다 짧게, pre_ping으로 끊긴 연결을 걸러낸다)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+
+    # 읽기 복제본 (DB_REPLICA_HOSTS=host1,host2, 계정/DB 이름은 primary와 같다)
+    # 조회 API는 복제본을 쓰고, 쓰기를 한 사용자는 REPLICA_STICKY_SECONDS 동안 primary에서 읽는다
+    SQLALCHEMY_BINDS = {
+        f'replica_{index}': f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{host.strip()}/{os.getenv('DB_NAME')}"
+        for index, host in enumerate(filter(str.strip, os.getenv('DB_REPLICA_HOSTS', '').split(',')))
+    }
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
\ No newline at end of file
+    # 헤더에 적힌 해상도 상한 (작은 파일이 디코딩하면 거대한 픽셀이 되는 압축 폭탄 차단)
+    MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', 40_000_000))
+    MAX_IMAGE_SIDE = int(os.getenv('MAX_IMAGE_SIDE', 12_000))
+    # 움직이는 이미지(GIF 등) 프레임 수 / 전체 프레임 픽셀 합 상한
+    MAX_ANIMATION_FRAMES = int(os.getenv('MAX_ANIMATION_FRAMES', 300))
+    MAX_ANIMATION_PIXELS = int(os.getenv('MAX_ANIMATION_PIXELS', 100_000_000))
+
+    # 이미지 파일 전송을 웹 서버에 맡기기 (USE_X_SENDFILE: Apache/lighttpd, X_ACCEL_REDIRECT_PREFIX: nginx internal location)
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX')
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
+    # 토큰은 헤더로만 받는다 (EventSource를 쓰는 알림 스트림만 라우트에서 ?jwt= 를 허용)
+    JWT_TOKEN_LOCATION = ['headers']
+
+    # 알림 실시간 전송 (memory: 단일 프로세스, database: 여러 워커 간 전달)
+    EVENT_HUB_BACKEND = os.getenv('EVENT_HUB_BACKEND', 'memory')
+    EVENT_POLL_INTERVAL = float(os.getenv('EVENT_POLL_INTERVAL', 1.0))
+    EVENT_POLL_WINDOW = int(os.getenv('EVENT_POLL_WINDOW', 100))  # 늦게 커밋된 이벤트를 찾으려고 다시 읽는 id 범위
+    EVENT_RETENTION_SECONDS = int(os.getenv('EVENT_RETENTION_SECONDS', 3600))
+    SSE_HEARTBEAT_SECONDS = 15
+
+    # 이미지 후처리 작업 큐 (inprocess: 워커 프로세스 풀, inline: 요청 안에서 바로 처리)
+    JOB_BACKEND = os.getenv('JOB_BACKEND', 'inprocess')
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', 100))
+    JOB_START_METHOD = os.getenv('JOB_START_METHOD', 'spawn')
+    JOB_SWEEP_INTERVAL = int(os.getenv('JOB_SWEEP_INTERVAL', 30))  # 대기 작업을 다시 훑는 간격 (초)
+    JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', 600))  # running으로 이만큼 멈춘 작업은 다시 대기
+
+    # 공개 조회 API 응답 캐시 (local: 프로세스 메모리 LRU, redis: 워커 간 공유, 빈 값: 사용 안 함)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local') or None
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 30))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # 이미지 확인 시간 쓰기 지연 (초 단위 주기, 0이면 요청마다 바로 기록)
+    VIEW_FLUSH_INTERVAL = float(os.getenv('VIEW_FLUSH_INTERVAL', 2.0))
+    VIEW_FLUSH_BATCH_SIZE = int(os.getenv('VIEW_FLUSH_BATCH_SIZE', 200))
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""transcoded variant sizes on images
+
+Revision ID: 5e7a3b1d9c42
+Revises: c2d9f0e4a8b3
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7a3b1d9c42'
+down_revision = 'c2d9f0e4a8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('transcoded_sizes', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_column('transcoded_sizes')
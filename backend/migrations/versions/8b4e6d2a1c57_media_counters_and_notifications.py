@@ -0,0 +1,101 @@
+"""thumbnails, jobs, storage, counters, notification events, full-text index
+
+Revision ID: 8b4e6d2a1c57
+Revises: 3f1a2c9d7b10
+Create Date: 2026-10-18 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2a1c57'
+down_revision = '3f1a2c9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('unread_comment_count', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('derivative_widths', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_comment_at', sa.DateTime(), nullable=True))
+
+    op.create_table('image_reaction_counts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.Integer(), nullable=False),
+        sa.Column('emoji', sa.String(length=10), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['image_id'], ['images.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('image_id', 'emoji', name='unique_reaction_count')
+    )
+    op.create_table('image_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('source_url', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['image_id'], ['images.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('stored_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key')
+    )
+    op.create_table('notification_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(length=30), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    if op.get_bind().dialect.name == 'mysql':
+        op.create_index('ft_images_title_description', 'images', ['title', 'description'],
+                        mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+    # 기존 데이터로 카운터 채우기
+    op.execute(
+        "UPDATE images SET "
+        "comment_count = (SELECT COUNT(*) FROM comments WHERE comments.image_id = images.id), "
+        "last_comment_at = (SELECT MAX(comments.created_at) FROM comments WHERE comments.image_id = images.id), "
+        "updated_at = updated_at"
+    )
+    op.execute(
+        "INSERT INTO image_reaction_counts (image_id, emoji, count) "
+        "SELECT image_id, emoji, COUNT(*) FROM reactions GROUP BY image_id, emoji"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.drop_index('ft_images_title_description', table_name='images')
+
+    op.drop_table('notification_events')
+    op.drop_table('stored_files')
+    op.drop_table('image_jobs')
+    op.drop_table('image_reaction_counts')
+
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_column('last_comment_at')
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('derivative_widths')
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('unread_comment_count')
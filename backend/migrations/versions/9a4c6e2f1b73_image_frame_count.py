@@ -0,0 +1,26 @@
+"""frame count of animated images
+
+Revision ID: 9a4c6e2f1b73
+Revises: 5e7a3b1d9c42
+Create Date: 2026-10-18 11:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c6e2f1b73'
+down_revision = '5e7a3b1d9c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('frame_count', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_column('frame_count')
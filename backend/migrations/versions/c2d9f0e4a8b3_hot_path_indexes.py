@@ -0,0 +1,38 @@
+"""composite indexes for feed, comments, reactions, jobs and notification events
+
+Revision ID: c2d9f0e4a8b3
+Revises: 8b4e6d2a1c57
+Create Date: 2026-10-18 10:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d9f0e4a8b3'
+down_revision = '8b4e6d2a1c57'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_images_created_at_id', 'images', ['created_at', 'id']),
+    ('ix_images_user_id_created_at', 'images', ['user_id', 'created_at']),
+    ('ix_comments_image_id_created_at', 'comments', ['image_id', 'created_at']),
+    ('ix_comments_user_id', 'comments', ['user_id']),
+    ('ix_reactions_image_id_emoji', 'reactions', ['image_id', 'emoji']),
+    ('ix_image_jobs_image_id_id', 'image_jobs', ['image_id', 'id']),
+    ('ix_image_jobs_status', 'image_jobs', ['status']),
+    ('ix_notification_events_user_id_id', 'notification_events', ['user_id', 'id']),
+    ('ix_notification_events_created_at', 'notification_events', ['created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,39 @@
+"""perceptual hash and hash chunk indexes on images
+
+Revision ID: d3b8f5a1e6c0
+Revises: 9a4c6e2f1b73
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b8f5a1e6c0'
+down_revision = '9a4c6e2f1b73'
+branch_labels = None
+depends_on = None
+
+
+CHUNK_COLUMNS = ['phash_0', 'phash_1', 'phash_2', 'phash_3']
+
+
+def upgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('phash', sa.BigInteger(), nullable=True))
+        for column in CHUNK_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.Integer(), nullable=True))
+
+    for column in CHUNK_COLUMNS:
+        op.create_index(f'ix_images_{column}', 'images', [column])
+
+
+def downgrade():
+    for column in reversed(CHUNK_COLUMNS):
+        op.drop_index(f'ix_images_{column}', table_name='images')
+
+    with op.batch_alter_table('images') as batch_op:
+        for column in reversed(CHUNK_COLUMNS):
+            batch_op.drop_column(column)
+        batch_op.drop_column('phash')
@@ -0,0 +1,32 @@
+"""placeholder size, blurhash and dominant color on images
+
+Revision ID: e1f4a7c2b985
+Revises: d3b8f5a1e6c0
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f4a7c2b985'
+down_revision = 'd3b8f5a1e6c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('blurhash', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('dominant_color', sa.String(length=7), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_column('dominant_color')
+        batch_op.drop_column('blurhash')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
@@ -1,8 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import pytz
+from services.replicas import RoutingSession
 
-db = SQLAlchemy()
+# 조회 엔드포인트의 SELECT를 읽기 복제본으로 보내는 세션 (services/replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 KST = pytz.timezone('Asia/Seoul')
 
@@ -19,6 +21,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=get_kst_now)
+    unread_comment_count = db.Column(db.Integer)  # 읽지 않은 댓글 수 캐시 (NULL이면 다시 계산)
     
     images = db.relationship('Image', backref='user', lazy=True)
     comments = db.relationship('Comment', backref='user', lazy=True)
@@ -35,10 +38,45 @@ class Image(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=get_kst_now)
     updated_at = db.Column(db.DateTime, default=get_kst_now, onupdate=get_kst_now)
+    derivative_widths = db.Column(db.String(50))  # 생성된 WebP 썸네일 폭 (예: "320,640,1280")
+    # 피드 자리 표시 정보 (services/placeholders.py): 방향 반영 원본 크기, 흐린 미리보기, 대표 색
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    blurhash = db.Column(db.String(50))
+    dominant_color = db.Column(db.String(7))  # #rrggbb
+    frame_count = db.Column(db.Integer)  # 움직이는 이미지의 프레임 수 (정지 이미지는 1 또는 NULL)
+    transcoded_sizes = db.Column(db.String(100))  # 원본/변환본 크기 (예: "original:2400000,avif:210000,webp:310000")
+    # 지각 해시(64비트 dHash)와 16비트씩 나눈 조각 (비슷한 이미지 조회용, services/similarity.py)
+    phash = db.Column(db.BigInteger)
+    phash_0 = db.Column(db.Integer)
+    phash_1 = db.Column(db.Integer)
+    phash_2 = db.Column(db.Integer)
+    phash_3 = db.Column(db.Integer)
+
+    # 비정규화 카운터 (services/counters.py에서 갱신)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_comment_at = db.Column(db.DateTime)
 
     comments = db.relationship('Comment', backref='image', lazy=True, cascade='all, delete-orphan')
     reactions = db.relationship('Reaction', backref='image', lazy=True, cascade='all, delete-orphan')
     views = db.relationship('ImageView', backref='image', lazy=True, cascade='all, delete-orphan')
+    jobs = db.relationship('ImageJob', backref='image', lazy=True, cascade='all, delete-orphan')
+    reaction_counts = db.relationship('ImageReactionCount', backref='image', lazy=True, cascade='all, delete-orphan')
+
+    __table_args__ = (
+        # 피드 최신순/커서 페이지네이션
+        db.Index('ix_images_created_at_id', 'created_at', 'id'),
+        # 내 이미지 목록, 알림 조회
+        db.Index('ix_images_user_id_created_at', 'user_id', 'created_at'),
+        # 비슷한 이미지 후보 조회 (조각별로 같은 값 찾기)
+        db.Index('ix_images_phash_0', 'phash_0'),
+        db.Index('ix_images_phash_1', 'phash_1'),
+        db.Index('ix_images_phash_2', 'phash_2'),
+        db.Index('ix_images_phash_3', 'phash_3'),
+        # 제목/설명 전문 검색용 (MySQL 전용, 한국어 부분 일치를 위해 ngram 파서 사용)
+        db.Index('ft_images_title_description', 'title', 'description',
+                 mysql_prefix='FULLTEXT', mysql_with_parser='ngram').ddl_if(dialect='mysql'),
+    )
 
 class Comment(db.Model):
     __tablename__ = 'comments'
@@ -49,6 +87,12 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=get_kst_now)
 
+    __table_args__ = (
+        # 이미지별 댓글 목록(작성순), 댓글 수/마지막 댓글 시간, 읽지 않은 댓글
+        db.Index('ix_comments_image_id_created_at', 'image_id', 'created_at'),
+        db.Index('ix_comments_user_id', 'user_id'),
+    )
+
 class Reaction(db.Model):
     __tablename__ = 'reactions'
     
@@ -59,7 +103,23 @@ class Reaction(db.Model):
     created_at = db.Column(db.DateTime, default=get_kst_now)
 
     # 한 사용자가 같은 이미지에 같은 이모티콘은 한 번만
-    __table_args__ = (db.UniqueConstraint('emoji', 'image_id', 'user_id', name='unique_reaction'),)
+    __table_args__ = (
+        db.UniqueConstraint('emoji', 'image_id', 'user_id', name='unique_reaction'),
+        # 이미지별 반응 조회 (unique_reaction은 emoji가 앞이라 image_id 조회에 못 쓴다)
+        db.Index('ix_reactions_image_id_emoji', 'image_id', 'emoji'),
+    )
+
+
+class ImageReactionCount(db.Model):
+    __tablename__ = 'image_reaction_counts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    image_id = db.Column(db.Integer, db.ForeignKey('images.id'), nullable=False)
+    emoji = db.Column(db.String(10), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    # 이미지별 이모티콘마다 하나의 행
+    __table_args__ = (db.UniqueConstraint('image_id', 'emoji', name='unique_reaction_count'),)
 
 
 class ImageView(db.Model):
@@ -71,4 +131,50 @@ class ImageView(db.Model):
     last_viewed_at = db.Column(db.DateTime, default=get_kst_now, onupdate=get_kst_now)
     
     # 한 사용자가 한 이미지는 하나의 기록만
-    __table_args__ = (db.UniqueConstraint('image_id', 'user_id', name='unique_view'),)
\ No newline at end of file
+    __table_args__ = (db.UniqueConstraint('image_id', 'user_id', name='unique_view'),)
+
+
+class ImageJob(db.Model):
+    __tablename__ = 'image_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    image_id = db.Column(db.Integer, db.ForeignKey('images.id'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # derivatives 등 작업 종류
+    source_url = db.Column(db.String(500), nullable=False)  # 작업 대상 파일명 (작업 중 교체 감지용)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=get_kst_now)
+    updated_at = db.Column(db.DateTime, default=get_kst_now, onupdate=get_kst_now)
+
+    __table_args__ = (
+        # 이미지의 최근 작업 조회, 재시작 시 대기 작업 조회
+        db.Index('ix_image_jobs_image_id_id', 'image_id', 'id'),
+        db.Index('ix_image_jobs_status', 'status'),
+    )
+
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), unique=True, nullable=False)  # ab/cd/<sha256>.<ext>
+    content_hash = db.Column(db.String(64), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # 이 파일을 쓰는 이미지 수
+    created_at = db.Column(db.DateTime, default=get_kst_now)
+
+
+class NotificationEvent(db.Model):
+    __tablename__ = 'notification_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    event_type = db.Column(db.String(30), nullable=False)  # comment, unread-count
+    data = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=get_kst_now)
+
+    __table_args__ = (
+        # 재연결 시 사용자별 놓친 이벤트 조회, 오래된 이벤트 정리
+        db.Index('ix_notification_events_user_id_id', 'user_id', 'id'),
+        db.Index('ix_notification_events_created_at', 'created_at'),
+    )
@@ -1,10 +1,16 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, verify_jwt_in_request, get_jwt_identity
 from models import db, User
 
 auth_bp = Blueprint('auth', __name__)
 
+# 로그인한 경우 사용자 ID, 아니면 None (로그인 없이도 쓰는 조회 API용)
+def optional_user_id():
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    return int(identity) if identity else None
+
 # 회원가입
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -1,27 +1,33 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Comment, Image, User
+from models import db, Comment, Image, User, get_kst_now
+from services import counters, notifications, cache
+from services.cache import cached_response
+from services.replicas import read_replica
+from services.comments import comment_page, serialize_comment
+from services.pagination import InvalidCursor
 
 comments_bp = Blueprint('comments', __name__)
 
-# 특정 이미지의 댓글 목록 조회
+DEFAULT_COMMENT_LIMIT = 50
+MAX_COMMENT_LIMIT = 100
+
+# 특정 이미지의 댓글 목록 조회 (커서 페이지네이션, order=asc|desc)
 @comments_bp.route('/image/<int:image_id>', methods=['GET'])
+@read_replica
+@cached_response(lambda image_id: [f'comments:{image_id}'])
 def get_comments(image_id):
-    comments = Comment.query.filter_by(image_id=image_id).order_by(Comment.created_at.asc()).all()
+    limit = min(max(request.args.get('limit', DEFAULT_COMMENT_LIMIT, type=int), 1), MAX_COMMENT_LIMIT)
+    order = request.args.get('order', 'asc')
     
-    result = []
-    for comment in comments:
-        user = User.query.get(comment.user_id)
-
-        result.append({
-            'id': comment.id,
-            'content': comment.content,
-            'userId': comment.user_id,
-            'username': user.nickname if user else '알 수 없음',
-            'createdAt': comment.created_at.isoformat()
-        })
+    try:
+        rows, next_cursor = comment_page(image_id, request.args.get('cursor'), limit, order)
+    except InvalidCursor:
+        return jsonify({'message': '잘못된 커서입니다.'}), 400
+    
+    result = [serialize_comment(row.Comment, row.nickname) for row in rows]
     
-    return jsonify({'comments': result}), 200
+    return jsonify({'comments': result, 'nextCursor': next_cursor}), 200
 
 # 댓글 작성
 @comments_bp.route('', methods=['POST'])
@@ -38,26 +44,37 @@ def create_comment():
     
     # 이미지 존재 확인
     image = Image.query.get_or_404(image_id)
+    image_id = image.id
+    author = db.session.query(User.username, User.nickname).filter_by(id=current_user_id).first_or_404()
     
     new_comment = Comment(
         content=content,
         image_id=image_id,
-        user_id=current_user_id
+        user_id=current_user_id,
+        created_at=get_kst_now().replace(tzinfo=None)  # DB에 저장되는 값과 같게 (DATETIME은 시간대 없음)
     )
     
     db.session.add(new_comment)
+    counters.comment_added(image.id, new_comment.created_at)
+    notifications.comment_created(image.user_id, current_user_id)
+    db.session.flush()
+    
+    # 커밋하면 객체가 만료되므로 응답/알림에 쓸 값을 미리 만들어 둔다
+    result = {
+        'id': new_comment.id,
+        'content': new_comment.content,
+        'username': author.username,
+        'createdAt': new_comment.created_at.isoformat()
+    }
+    payload = notifications.notification_payload(new_comment, image.title, author.nickname)
+    owner_id = image.user_id
     db.session.commit()
-
-    user = User.query.get(current_user_id)
+    cache.invalidate_comments(image_id)
+    notifications.publish_new_comment(owner_id, current_user_id, payload)
     
     return jsonify({
         'message': '댓글 작성 완료!',
-        'comment': {
-            'id': new_comment.id,
-            'content': new_comment.content,
-            'username': new_comment.user.username,
-            'createdAt': new_comment.created_at.isoformat()
-        }
+        'comment': result
     }), 201
 
 # 댓글 삭제
@@ -70,7 +87,13 @@ def delete_comment(id):
     if comment.user_id != current_user_id:
         return jsonify({'message': '권한이 없습니다.'}), 403
     
+    image_id = comment.image_id
     db.session.delete(comment)
+    db.session.flush()
+    counters.comment_removed(image_id)
+    if comment.image.user_id != current_user_id:
+        notifications.invalidate(comment.image.user_id)
     db.session.commit()
+    cache.invalidate_comments(image_id)
     
     return jsonify({'message': '댓글 삭제 완료!'}), 200
\ No newline at end of file
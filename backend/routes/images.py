@@ -1,48 +1,111 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
-from models import db, Image, User, Comment
-import os
-from datetime import datetime
+from models import db, Image
+from services.feed import feed_query, serialize_feed_row, thumbnail_urls, feed_page_after, approximate_image_count
+from services.pagination import InvalidCursor, parse_id_list
+from services.comments import first_comment_pages, serialize_comment
+from services.reactions import reaction_summaries
+from routes.auth import optional_user_id
+from services import search
+from services.search import search_page
+from services import storage, notifications, cache
+from services.cache import cached_response, add_cache_tags
+from services.replicas import read_replica
+from services.jobs import create_job, submit_jobs, latest_jobs
+from services.transcode import parse_sizes, savings_report
+from services.analysis import apply_analysis, copy_analysis
+from services.similarity import similar_images, to_unsigned, SIMILAR_MAX_DISTANCE, DUPLICATE_MAX_DISTANCE
+from services.delivery import send_upload
+from services.uploads import check_upload_request, ingest_upload, UploadRejected
 
 images_bp = Blueprint('images', __name__)
 
-UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+MAX_SEARCH_LIMIT = 50
+MAX_BATCH_IMAGES = 50
+BATCH_COMMENT_LIMIT = 10
+MAX_SIMILAR_LIMIT = 50
+MAX_DUPLICATE_WARNINGS = 5
 
-# 파일 확장자 체크
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# 분석(지각 해시, 자리 표시 정보)/썸네일/변환본 준비: 같은 파일을 쓰는 이미지에 이미 있으면 재사용,
+# 없으면 작업 등록 (업로드 요청에서 바로 분석한 JPEG는 그 결과를 쓴다, services/analysis.py)
+# (이 요청이 이미 파일 참조를 잡고 있으므로, 그 이미지가 동시에 삭제되어도 파일은 지워지지 않는다)
+def prepare_derivatives(image, details):
+    existing = Image.query.filter(
+        Image.image_url == image.image_url,
+        db.or_(Image.derivative_widths.isnot(None), Image.transcoded_sizes.isnot(None), Image.phash.isnot(None))
+    )
+    # 파일을 교체하는 이미지 자신(이전 파일의 분석 값이 남아 있다)은 제외
+    if image.id is not None:
+        existing = existing.filter(Image.id != image.id)
+    existing = existing.first()
+    
+    # 분석, 썸네일 생성, WebP/AVIF 변환은 작업 큐에서 처리 (진행 상황은 /<id>/status)
+    jobs = []
+    if 'phash' in details:
+        apply_analysis(image, details)
+    elif existing and existing.phash is not None:
+        copy_analysis(image, existing)
+    else:
+        # 분석 전까지는 헤더의 크기만 둔다
+        apply_analysis(image, {'width': details['width'], 'height': details['height'],
+                               'blurhash': None, 'dominant_color': None, 'phash': None})
+        jobs.append(create_job(image, 'analyze'))
+    if existing and existing.derivative_widths:
+        image.derivative_widths = existing.derivative_widths
+    else:
+        jobs.append(create_job(image))
+    if existing and existing.transcoded_sizes:
+        image.transcoded_sizes = existing.transcoded_sizes
+    else:
+        jobs.append(create_job(image, 'transcode'))
+    return jobs
+
+# 비슷한 이미지 [(image_id, 거리)] -> 피드 형식 목록 (거리순 유지)
+def serialize_similar(matches):
+    if not matches:
+        return []
+    distances = dict(matches)
+    rows = {row.Image.id: row for row in feed_query().filter(Image.id.in_(distances)).all()}
+    result = []
+    for image_id, distance in matches:
+        if image_id in rows:
+            item = serialize_feed_row(rows[image_id])
+            item['distance'] = distance
+            result.append(item)
+    return result
 
 # 모든 이미지 조회 (페이지네이션)
+# cursor 파라미터가 있으면 키셋 페이지네이션, 없으면 기존 page 방식
 @images_bp.route('', methods=['GET'])
+@read_replica
+@cached_response(lambda: ['feed'])
 def get_all_images():
-    page = request.args.get('page', 1, type=int)
     per_page = 12
+
+    if 'cursor' in request.args:
+        try:
+            rows, next_cursor = feed_page_after(request.args.get('cursor'), per_page)
+        except InvalidCursor:
+            return jsonify({'message': '잘못된 커서입니다.'}), 400
+
+        add_cache_tags(*(f'image:{row.Image.id}' for row in rows))
+        response = {
+            'images': [serialize_feed_row(row) for row in rows],
+            'nextCursor': next_cursor,
+        }
+        if request.args.get('withTotal', 'false').lower() == 'true':
+            response['approximateTotal'] = approximate_image_count()
+
+        return jsonify(response), 200
+
+    page = request.args.get('page', 1, type=int)
     
-    images = Image.query.order_by(Image.created_at.desc()).paginate(
+    images = feed_query().order_by(Image.created_at.desc(), Image.id.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    result = []
-    for image in images.items:
-
-        comment_count = Comment.query.filter_by(image_id=image.id).count()
-        latest_comment = Comment.query.filter_by(image_id=image.id)\
-            .order_by(Comment.created_at.desc()).first()
-        last_comment_at = latest_comment.created_at if latest_comment else image.created_at
-
-        result.append({
-            'id': image.id,
-            'title': image.title,
-            'description': image.description,
-            'imageUrl': f'http://localhost:5000/api/images/files/{image.image_url}',
-            'userId': image.user_id,
-            'username': image.user.nickname,
-            'createdAt': image.created_at.isoformat(),
-            'commentCount': comment_count,
-            'lastCommentAt': last_comment_at.isoformat(),
-        })
+    result = [serialize_feed_row(row) for row in images.items]
+    add_cache_tags(*(f'image:{row.Image.id}' for row in images.items))
     
     return jsonify({
         'images': result,
@@ -50,61 +113,118 @@ def get_all_images():
         'currentPage': page
     }), 200
 
-# 이미지 검색
+# 이미지 검색 (관련도순, 커서 페이지네이션)
 @images_bp.route('/search', methods=['GET'])
+@read_replica
 def search_images():
     query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 12, type=int), 1), MAX_SEARCH_LIMIT)
     
     if not query:
-        return jsonify({'images': []}), 200
+        return jsonify({'images': [], 'nextCursor': None}), 200
     
-    images = Image.query.filter(
-        Image.title.contains(query) | Image.description.contains(query)
-    ).order_by(Image.created_at.desc()).all()
+    try:
+        rows, next_cursor = search_page(query, request.args.get('cursor'), limit)
+    except InvalidCursor:
+        return jsonify({'message': '잘못된 커서입니다.'}), 400
     
-    result = []
-    for image in images:
-
-        comment_count = Comment.query.filter_by(image_id=image.id).count()
-        latest_comment = Comment.query.filter_by(image_id=image.id)\
-            .order_by(Comment.created_at.desc()).first()
-        last_comment_at = latest_comment.created_at if latest_comment else image.created_at
-
-        result.append({
-            'id': image.id,
-            'title': image.title,
-            'description': image.description,
-            'imageUrl': f'http://localhost:5000/api/images/files/{image.image_url}',
-            'userId': image.user_id,
-            'username': image.user.nickname,
-            'createdAt': image.created_at.isoformat(),
-            'commentCount': comment_count,
-            'lastCommentAt': last_comment_at.isoformat(),
-        })
-    
-    return jsonify({'images': result}), 200
+    result = [serialize_feed_row(row) for row in rows]
+    
+    return jsonify({'images': result, 'nextCursor': next_cursor}), 200
 
 # 특정 이미지 조회
 @images_bp.route('/<int:id>', methods=['GET'])
+@read_replica
+@cached_response(lambda id: [f'image:{id}'])
 def get_image(id):
-    image = Image.query.get_or_404(id)
+    row = feed_query().filter(Image.id == id).first_or_404()
     
-    comment_count = Comment.query.filter_by(image_id=image.id).count()
-    latest_comment = Comment.query.filter_by(image_id=image.id)\
-        .order_by(Comment.created_at.desc()).first()
-    last_comment_at = latest_comment.created_at if latest_comment else image.created_at
+    result = serialize_feed_row(row)
+    # 상세 조회는 기존과 같이 아이디(username)를 내려준다
+    result['username'] = row.username
 
+    return jsonify(result), 200
 
+# 여러 이미지 상세 한 번에 조회 (이미지 + 작성자 + 첫 페이지 댓글 + 반응 요약)
+# GET ?ids=1,2,3 또는 POST {"ids": [1, 2, 3]}, 이미지 수와 관계없이 쿼리 3~4번
+@images_bp.route('/batch', methods=['GET', 'POST'])
+@read_replica
+def get_images_batch():
+    if request.method == 'POST':
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        valid = isinstance(ids, list) and all(isinstance(i, int) for i in ids)
+        image_ids = list(dict.fromkeys(ids)) if valid else None
+    else:
+        image_ids = parse_id_list(request.args.get('ids', ''))
+    
+    if not image_ids:
+        return jsonify({'message': '이미지 ID를 입력해주세요.'}), 400
+    if len(image_ids) > MAX_BATCH_IMAGES:
+        return jsonify({'message': f'이미지는 한 번에 {MAX_BATCH_IMAGES}개까지 조회할 수 있습니다.'}), 400
+    
+    rows = {row.Image.id: row for row in feed_query().filter(Image.id.in_(image_ids)).all()}
+    found_ids = [image_id for image_id in image_ids if image_id in rows]
+    comment_pages = first_comment_pages(found_ids, BATCH_COMMENT_LIMIT)
+    summaries = reaction_summaries(found_ids, optional_user_id())
+    
+    result = []
+    for image_id in found_ids:
+        row = rows[image_id]
+        comments, comments_next_cursor = comment_pages[image_id]
+        
+        item = serialize_feed_row(row)
+        item['username'] = row.username
+        item['comments'] = [serialize_comment(c.Comment, c.nickname) for c in comments]
+        item['commentsNextCursor'] = comments_next_cursor
+        item['reactions'] = summaries[image_id]
+        result.append(item)
+    
     return jsonify({
-        'id': image.id,
-        'title': image.title,
-        'description': image.description,
-        'imageUrl': f'http://localhost:5000/api/images/files/{image.image_url}',
-        'userId': image.user_id,
-        'username': image.user.username,
-        'createdAt': image.created_at.isoformat(),
-        'commentCount': comment_count,
-        'lastCommentAt': last_comment_at.isoformat(),
+        'images': result,
+        'missingIds': [image_id for image_id in image_ids if image_id not in rows]
+    }), 200
+
+# 비슷한 이미지 조회 (지각 해시 해밍 거리순, distance는 0~7)
+@images_bp.route('/<int:id>/similar', methods=['GET'])
+@read_replica
+@cached_response(lambda id: ['feed', f'image:{id}'])
+def get_similar_images(id):
+    image = Image.query.get_or_404(id)
+    limit = min(max(request.args.get('limit', 12, type=int), 1), MAX_SIMILAR_LIMIT)
+    max_distance = min(max(request.args.get('distance', SIMILAR_MAX_DISTANCE, type=int), 0), SIMILAR_MAX_DISTANCE)
+    
+    # 해시 계산 전 이미지 (flask --app app backfill-phash 로 채운다)
+    if image.phash is None:
+        return jsonify({'images': []}), 200
+    
+    matches = similar_images(to_unsigned(image.phash), max_distance, limit, exclude_id=id)
+    add_cache_tags(*(f'image:{image_id}' for image_id, _ in matches))
+    return jsonify({'images': serialize_similar(matches)}), 200
+
+# 이미지 후처리(썸네일 생성, WebP/AVIF 변환) 상태 조회
+@images_bp.route('/<int:id>/status', methods=['GET'])
+def get_image_status(id):
+    image = Image.query.get_or_404(id)
+    jobs = latest_jobs(id)
+    job = jobs.get('derivatives')
+    transcode_job = jobs.get('transcode')
+    analyze_job = jobs.get('analyze')
+    
+    return jsonify({
+        'imageId': image.id,
+        'status': job.status if job else 'none',
+        'error': job.error if job else None,
+        'updatedAt': job.updated_at.isoformat() if job else None,
+        'thumbnails': thumbnail_urls(image),
+        'transcode': {
+            'status': transcode_job.status if transcode_job else 'none',
+            'error': transcode_job.error if transcode_job else None,
+            'savings': savings_report(parse_sizes(image.transcoded_sizes)),
+        },
+        'analysis': {
+            'status': 'done' if image.phash is not None else (analyze_job.status if analyze_job else 'none'),
+            'error': analyze_job.error if analyze_job else None,
+        },
     }), 200
 
 # 이미지 업로드
@@ -113,51 +233,75 @@ def get_image(id):
 def upload_image():
     current_user_id = int(get_jwt_identity())
     
+    # 본문을 받기 전에 형식/크기를 확인하고, 받는 동안 제목이 파일보다 먼저 왔는지와 파일 내용(매직 넘버)을 확인한다
+    try:
+        check_upload_request(request, required_fields={'title': '제목을 입력해주세요.'})
+        file = request.files.get('image')
+    except UploadRejected as e:
+        return jsonify({'message': e.message}), e.status
+    
     # 파일 체크
-    if 'image' not in request.files:
+    if file is None:
         return jsonify({'message': '이미지 파일이 없습니다.'}), 400
     
-    file = request.files['image']
-    
     if file.filename == '':
         return jsonify({'message': '파일이 선택되지 않았습니다.'}), 400
     
-    if not allowed_file(file.filename):
-        return jsonify({'message': '허용되지 않는 파일 형식입니다.'}), 400
-    
-    # 파일 저장
-    filename = secure_filename(file.filename)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    unique_filename = f"{timestamp}_{filename}"
-    filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-    file.save(filepath)
-    
-    # 데이터베이스에 저장
     title = request.form.get('title')
     description = request.form.get('description', '')
     
+    # 빈 제목은 파일을 받은 뒤에 알 수 있다 (받은 파일은 저장소로 옮기지 않고 임시 파일째 버린다)
     if not title:
-        os.remove(filepath)  # 파일 삭제
         return jsonify({'message': '제목을 입력해주세요.'}), 400
     
+    # 파일 저장 (해상도 확인 후 내용 해시 경로로 이동, 같은 내용이 이미 있으면 기존 파일을 참조)
+    try:
+        stored_key, details = ingest_upload(file)
+    except UploadRejected as e:
+        return jsonify({'message': e.message}), e.status
+    
+    # 데이터베이스에 저장
     new_image = Image(
         title=title,
         description=description,
-        image_url=unique_filename,
+        image_url=stored_key,
+        frame_count=details['frames'],
         user_id=current_user_id
     )
     
     db.session.add(new_image)
+    jobs = prepare_derivatives(new_image, details)
+    
+    # 이미 올라온 거의 같은 이미지가 있으면 응답에 경고로 알려준다 (업로드는 그대로 진행, checkDuplicates=false면 생략)
+    # 해시가 아직 없으면(analyze 작업 대기) duplicatesPending으로 알리고, 작업이 끝난 뒤
+    # /<id>/similar?distance=3 으로 확인할 수 있다.
+    duplicates, duplicates_pending = [], False
+    if request.form.get('checkDuplicates', 'true').lower() != 'false':
+        if new_image.phash is not None:
+            duplicates = similar_images(to_unsigned(new_image.phash), DUPLICATE_MAX_DISTANCE,
+                                        MAX_DUPLICATE_WARNINGS, exclude_id=new_image.id)
+        else:
+            duplicates_pending = True
+    
     db.session.commit()
+    search.index_image(new_image)
+    cache.invalidate('feed')
+    submit_jobs(jobs)
     
-    return jsonify({
+    response = {
         'message': '업로드 성공!',
         'image': {
             'id': new_image.id,
             'title': new_image.title,
-            'imageUrl': f'http://localhost:5000/api/images/files/{unique_filename}'
+            'imageUrl': f'http://localhost:5000/api/images/files/{stored_key}'
         }
-    }), 201
+    }
+    if duplicates:
+        response['duplicates'] = serialize_similar(duplicates)
+    if duplicates_pending:
+        response['duplicatesPending'] = True
+    
+    return jsonify(response), 201
 
 # 이미지 수정
 @images_bp.route('/<int:id>', methods=['PUT'])
@@ -170,6 +314,11 @@ def update_image(id):
     if image.user_id != current_user_id:
         return jsonify({'message': '권한이 없습니다.'}), 403
     
+    try:
+        file = request.files.get('image')
+    except UploadRejected as e:
+        return jsonify({'message': e.message}), e.status
+    
     # 제목, 설명 업데이트
     title = request.form.get('title')
     description = request.form.get('description', '')
@@ -180,25 +329,29 @@ def update_image(id):
         image.description = description
     
     # 새 이미지 파일이 있으면 교체
-    if 'image' in request.files:
-        file = request.files['image']
-        
-        if file.filename != '' and allowed_file(file.filename):
-            # 기존 파일 삭제
-            old_filepath = os.path.join(UPLOAD_FOLDER, image.image_url)
-            if os.path.exists(old_filepath):
-                os.remove(old_filepath)
-            
-            # 새 파일 저장
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            unique_filename = f"{timestamp}_{filename}"
-            filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-            file.save(filepath)
+    jobs = []
+    if file is not None:
+        if file.filename != '':
+            # 새 파일 저장 후 기존 파일 참조 해제
+            try:
+                stored_key, details = ingest_upload(file)
+            except UploadRejected as e:
+                return jsonify({'message': e.message}), e.status
             
-            image.image_url = unique_filename
+            if stored_key != image.image_url:
+                storage.release(image.image_url)
+                image.image_url = stored_key
+                image.frame_count = details['frames']
+                image.derivative_widths = None
+                image.transcoded_sizes = None
+                jobs = prepare_derivatives(image, details)
+            else:
+                storage.release(stored_key)  # 같은 파일을 다시 올린 경우 방금 늘린 참조만 되돌린다
     
     db.session.commit()
+    search.index_image(image)
+    cache.invalidate_image(id)
+    submit_jobs(jobs)
     
     return jsonify({'message': '수정 완료!'}), 200
 
@@ -213,18 +366,21 @@ def delete_image(id):
     if image.user_id != current_user_id:
         return jsonify({'message': '권한이 없습니다.'}), 403
     
-    # 파일 삭제
-    filepath = os.path.join(UPLOAD_FOLDER, image.image_url)
-    if os.path.exists(filepath):
-        os.remove(filepath)
+    # 파일 참조 해제 (다른 이미지가 같은 파일을 쓰지 않으면 삭제)
+    storage.release(image.image_url)
     
     # 데이터베이스에서 삭제
     db.session.delete(image)
+    notifications.invalidate(current_user_id)
     db.session.commit()
+    search.remove_image(id)
+    cache.invalidate_image(id)
+    cache.invalidate_comments(id)
+    cache.invalidate_reactions(id)
     
     return jsonify({'message': '삭제 완료!'}), 200
 
 # 이미지 파일 서빙
-@images_bp.route('/files/<filename>', methods=['GET'])
+@images_bp.route('/files/<path:filename>', methods=['GET'])
 def serve_image(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
\ No newline at end of file
+    return send_upload(current_app.config['UPLOAD_FOLDER'], filename)
\ No newline at end of file
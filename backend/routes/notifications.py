@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Image, Comment, User, ImageView
-from datetime import datetime
+from models import db
+from services.notifications import unread_count, latest_unread, notification_payload
+from services.events import get_hub, format_sse
 
 notifications_bp = Blueprint('notifications', __name__)
 
@@ -12,32 +13,8 @@ def get_unread_count():
     try:
         current_user_id = int(get_jwt_identity())
         
-        # 내가 올린 이미지들
-        my_images = Image.query.filter_by(user_id=current_user_id).all()
-        
-        total_unread = 0
-        for image in my_images:
-            # 마지막 확인 시간
-            last_view = ImageView.query.filter_by(
-                image_id=image.id,
-                user_id=current_user_id
-            ).first()
-            
-            if last_view:
-                # 마지막 확인 이후 댓글 수
-                unread = Comment.query.filter(
-                    Comment.image_id == image.id,
-                    Comment.created_at > last_view.last_viewed_at,
-                    Comment.user_id != current_user_id
-                ).count()
-            else:
-                # 한 번도 확인 안 했으면 내 댓글 제외한 전체
-                unread = Comment.query.filter(
-                    Comment.image_id == image.id,
-                    Comment.user_id != current_user_id
-                ).count()
-            
-            total_unread += unread
+        # 캐시된 개수 (없으면 조인 한 번으로 계산)
+        total_unread = unread_count(current_user_id)
         
         return jsonify({'count': total_unread}), 200
         
@@ -52,49 +29,10 @@ def get_notifications():
     try:
         current_user_id = int(get_jwt_identity())
         
-        # 내가 올린 이미지들
-        my_images = Image.query.filter_by(user_id=current_user_id).all()
-        
-        notifications = []
-        
-        for image in my_images:
-            # 마지막 확인 시간
-            last_view = ImageView.query.filter_by(
-                image_id=image.id,
-                user_id=current_user_id
-            ).first()
-            
-            # 읽지 않은 댓글들
-            if last_view:
-                unread_comments = Comment.query.filter(
-                    Comment.image_id == image.id,
-                    Comment.created_at > last_view.last_viewed_at,
-                    Comment.user_id != current_user_id
-                ).order_by(Comment.created_at.desc()).all()
-            else:
-                unread_comments = Comment.query.filter(
-                    Comment.image_id == image.id,
-                    Comment.user_id != current_user_id
-                ).order_by(Comment.created_at.desc()).all()
-            
-            # 알림 생성
-            for comment in unread_comments:
-                commenter = User.query.get(comment.user_id)
-                notifications.append({
-                    'id': f"{image.id}_{comment.id}",
-                    'imageId': image.id,
-                    'imageTitle': image.title,
-                    'commentId': comment.id,
-                    'commenterNickname': commenter.nickname if commenter else '알 수 없음',
-                    'commentPreview': comment.content[:30] + '...' if len(comment.content) > 30 else comment.content,
-                    'createdAt': comment.created_at.isoformat()
-                })
+        # 최신순 최대 10개 (정렬/LIMIT은 SQL에서)
+        rows = latest_unread(current_user_id, limit=10)
         
-        # 최신순 정렬
-        notifications.sort(key=lambda x: x['createdAt'], reverse=True)
-        
-        # 최대 10개만
-        notifications = notifications[:10]
+        notifications = [notification_payload(*row) for row in rows]
         
         return jsonify({'notifications': notifications}), 200
         
@@ -102,4 +40,47 @@ def get_notifications():
         print(f"에러: {str(e)}")
         import traceback
         traceback.print_exc()
-        return jsonify({'message': '알림 목록 조회 실패'}), 500
\ No newline at end of file
+        return jsonify({'message': '알림 목록 조회 실패'}), 500
+
+# 알림 스트림 (Server-Sent Events)
+# 새 댓글(comment)과 읽지 않은 개수(unread-count) 이벤트를 보낸다.
+# Last-Event-ID로 재연결하면 놓친 이벤트만 다시 보내고, 이어받을 수 없을 때만 개수를 새로 계산한다.
+# EventSource는 헤더를 못 붙이므로 이 라우트만 ?jwt= 로도 인증할 수 있다.
+@notifications_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_notifications():
+    current_user_id = int(get_jwt_identity())
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+    
+    hub = get_hub()
+    subscription = hub.subscribe(current_user_id)
+    
+    missed = hub.replay(current_user_id, last_event_id) if last_event_id else None
+    if missed is None:
+        initial = [{'id': None, 'type': 'unread-count', 'data': {'count': unread_count(current_user_id)}}]
+    else:
+        initial = missed
+    
+    # 스트림이 열려 있는 동안 DB 연결을 잡고 있지 않도록 세션 정리
+    db.session.close()
+    
+    def generate():
+        sent_ids = {event['id'] for event in initial if event['id']}
+        try:
+            yield 'retry: 3000\n\n'
+            for event in initial:
+                yield format_sse(event)
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ': ping\n\n'
+                elif event['id'] not in sent_ids:
+                    yield format_sse(event)
+        finally:
+            subscription.close()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,43 +1,89 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Reaction, Image, User
-from sqlalchemy.exc import IntegrityError
+from models import db, Reaction, Image, User, get_kst_now
+from services import counters, cache
+from services.cache import cached_response
+from services.replicas import read_replica
+from services.pagination import InvalidCursor, parse_id_list
+from services.reactions import reaction_summaries, reaction_user_page
+from services.upsert import insert_if_absent, retry_on_deadlock
+from routes.auth import optional_user_id
 
 reactions_bp = Blueprint('reactions', __name__)
 
+MAX_SUMMARY_IMAGES = 50
+MAX_EMOJI_LENGTH = 10  # reactions.emoji 컬럼 길이
+DEFAULT_USER_LIMIT = 20
+MAX_USER_LIMIT = 100
+
 # 특정 이미지의 반응 통계 조회
 @reactions_bp.route('/image/<int:image_id>', methods=['GET'])
+@read_replica
+@cached_response(lambda image_id: [f'reactions:{image_id}'])
 def get_reactions(image_id):
-    reactions = Reaction.query.filter_by(image_id=image_id).all()
-    
-    # 이모티콘별 개수 집계
-    reaction_counts = {}
-    user_reactions = {}
-    
-    for reaction in reactions:
-        emoji = reaction.emoji
-        if emoji not in reaction_counts:
-            reaction_counts[emoji] = []
-        
-        user = User.query.get(reaction.user_id)
-        reaction_counts[emoji].append({
-            'userId': reaction.user_id,
-            'username': reaction.user.username
-        })
+    # 이모티콘별 개수는 카운터 테이블에서 읽는다
+    result = {
+        emoji: {'count': count, 'users': []}
+        for emoji, count in counters.reaction_counts(image_id).items()
+    }
     
-    # 결과: {"👍": 4, "😂": 2, ...}
-    result = {}
-    for emoji, users in reaction_counts.items():
-        result[emoji] = {
-            'count': len(users),
-            'users': users
-        }
+    reactions = db.session.query(Reaction.emoji, Reaction.user_id, User.username)\
+        .join(User, User.id == Reaction.user_id)\
+        .filter(Reaction.image_id == image_id).all()
+    
+    for emoji, user_id, username in reactions:
+        result.setdefault(emoji, {'count': 0, 'users': []})['users'].append({
+            'userId': user_id,
+            'username': username
+        })
     
     return jsonify({'reactions': result}), 200
 
+# 특정 이미지의 반응 요약 (이모티콘별 개수 + 내가 누른 이모티콘)
+@reactions_bp.route('/image/<int:image_id>/summary', methods=['GET'])
+@read_replica
+def get_reaction_summary(image_id):
+    summary = reaction_summaries([image_id], optional_user_id())[image_id]
+    
+    return jsonify(summary), 200
+
+# 여러 이미지의 반응 요약 (피드 한 페이지를 한 번에)
+@reactions_bp.route('/summary', methods=['GET'])
+@read_replica
+def get_reaction_summaries():
+    image_ids = parse_id_list(request.args.get('imageIds', ''))
+    
+    if not image_ids:
+        return jsonify({'message': '이미지 ID를 입력해주세요.'}), 400
+    if len(image_ids) > MAX_SUMMARY_IMAGES:
+        return jsonify({'message': f'이미지는 한 번에 {MAX_SUMMARY_IMAGES}개까지 조회할 수 있습니다.'}), 400
+    
+    summaries = reaction_summaries(image_ids, optional_user_id())
+    
+    return jsonify({'summaries': {str(image_id): summary for image_id, summary in summaries.items()}}), 200
+
+# 특정 이모티콘에 반응한 사용자 목록 (커서 페이지네이션)
+@reactions_bp.route('/image/<int:image_id>/users', methods=['GET'])
+@read_replica
+@cached_response(lambda image_id: [f'reactions:{image_id}'])
+def get_reaction_users(image_id):
+    emoji = request.args.get('emoji')
+    limit = min(max(request.args.get('limit', DEFAULT_USER_LIMIT, type=int), 1), MAX_USER_LIMIT)
+    
+    if not emoji:
+        return jsonify({'message': '이모티콘을 입력해주세요.'}), 400
+    
+    try:
+        users, next_cursor = reaction_user_page(image_id, emoji, request.args.get('cursor'), limit)
+    except InvalidCursor:
+        return jsonify({'message': '잘못된 커서입니다.'}), 400
+    
+    return jsonify({'emoji': emoji, 'users': users, 'nextCursor': next_cursor}), 200
+
 # 반응 추가/제거 (토글)
 @reactions_bp.route('', methods=['POST'])
 @jwt_required()
+@retry_on_deadlock
 def toggle_reaction():
     current_user_id = int(get_jwt_identity())
     data = request.get_json()
@@ -48,28 +94,33 @@ def toggle_reaction():
     if not emoji or not image_id:
         return jsonify({'message': '이모티콘과 이미지 ID를 입력해주세요.'}), 400
     
+    if not isinstance(emoji, str) or len(emoji) > MAX_EMOJI_LENGTH:
+        return jsonify({'message': '잘못된 이모티콘입니다.'}), 400
+    
     # 이미지 존재 확인
     image = Image.query.get_or_404(image_id)
     
-    # 이미 반응했는지 확인
-    existing = Reaction.query.filter_by(
+    # 없으면 추가, 이미 있으면 제거 (토글). 추가부터 시도해서 SELECT 없이 처리한다
+    # (지우기부터 하면 MySQL REPEATABLE READ에서 없는 행의 갭 락과 INSERT가 엇갈려 데드락이 나기 쉽다)
+    added = insert_if_absent(
+        Reaction,
+        {'emoji': emoji, 'image_id': image.id, 'user_id': current_user_id, 'created_at': get_kst_now()},
+        ['emoji', 'image_id', 'user_id']
+    )
+    if added:
+        counters.reaction_added(image.id, emoji)
+        db.session.commit()
+        cache.invalidate_reactions(image.id)
+        return jsonify({'message': '반응 추가!', 'action': 'added'}), 201
+    
+    # 이미 있던 반응 제거 (동시에 같은 요청이 먼저 지웠으면 개수는 그쪽에서만 줄인다)
+    removed = Reaction.query.filter_by(
         emoji=emoji,
-        image_id=image_id,
+        image_id=image.id,
         user_id=current_user_id
-    ).first()
-    
-    if existing:
-        # 이미 있으면 제거 (토글)
-        db.session.delete(existing)
-        db.session.commit()
-        return jsonify({'message': '반응 제거!', 'action': 'removed'}), 200
-    else:
-        # 없으면 추가
-        new_reaction = Reaction(
-            emoji=emoji,
-            image_id=image_id,
-            user_id=current_user_id
-        )
-        db.session.add(new_reaction)
-        db.session.commit()
-        return jsonify({'message': '반응 추가!', 'action': 'added'}), 201
\ No newline at end of file
+    ).delete(synchronize_session=False)
+    if removed:
+        counters.reaction_removed(image.id, emoji)
+    db.session.commit()
+    cache.invalidate_reactions(image.id)
+    return jsonify({'message': '반응 제거!', 'action': 'removed'}), 200
\ No newline at end of file
@@ -1,9 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Image, Comment, ImageView
+from models import db, User, Image
+from services import notifications
+from services.views import record_view
+from services.pagination import InvalidCursor
 
 users_bp = Blueprint('users', __name__)
 
+DEFAULT_MY_IMAGES_LIMIT = 20
+MAX_MY_IMAGES_LIMIT = 100
+
 # 내 프로필 조회
 @users_bp.route('/me', methods=['GET'])
 @jwt_required()
@@ -61,50 +67,22 @@ def update_nickname():
         print(f"에러: {str(e)}")
         return jsonify({'message': '닉네임 변경에 실패했습니다.'}), 500
 
-# 내가 올린 이미지 목록
+# 내가 올린 이미지 목록 (커서 페이지네이션, 이미지별 전체/읽지 않은 댓글 수 포함)
 @users_bp.route('/me/images', methods=['GET'])
 @jwt_required()
 def get_my_images():
     try:
         current_user_id = int(get_jwt_identity())
+        limit = min(max(request.args.get('limit', DEFAULT_MY_IMAGES_LIMIT, type=int), 1), MAX_MY_IMAGES_LIMIT)
         
-        images = Image.query.filter_by(user_id=current_user_id)\
-            .order_by(Image.created_at.desc()).all()
+        try:
+            rows, next_cursor = notifications.my_images_page(current_user_id, request.args.get('cursor'), limit)
+        except InvalidCursor:
+            return jsonify({'message': '잘못된 커서입니다.'}), 400
         
-        result = []
-        for image in images:
-
-            total_comments = Comment.query.filter_by(image_id=image.id).count()
-            last_view = ImageView.query.filter_by(
-                image_id=image.id,
-                user_id=current_user_id
-            ).first()
-
-            if last_view:
-                # 마지막 확인 이후 댓글 수 (읽지 않은 댓글)
-                unread_comments = Comment.query.filter(
-                    Comment.image_id == image.id,
-                    Comment.created_at > last_view.last_viewed_at,
-                    Comment.user_id != current_user_id  # 내 댓글 제외
-                ).count()
-            else:
-                # 한 번도 확인 안 했으면 내 댓글 제외한 전체
-                unread_comments = Comment.query.filter(
-                    Comment.image_id == image.id,
-                    Comment.user_id != current_user_id
-                ).count()
-
-            result.append({
-                'id': image.id,
-                'title': image.title,
-                'description': image.description,
-                'imageUrl': f'http://localhost:5000/api/images/files/{image.image_url}',
-                'createdAt': image.created_at.isoformat(),
-                'totalComments': total_comments,
-                'unreadComments': unread_comments
-            })
+        result = [notifications.serialize_my_image(row.Image, row.unread_comments) for row in rows]
         
-        return jsonify({'images': result}), 200
+        return jsonify({'images': result, 'nextCursor': next_cursor}), 200
     except Exception as e:
         print(f"에러: {str(e)}")
         return jsonify({'message': '이미지를 불러오는데 실패했습니다.'}), 500
@@ -116,30 +94,18 @@ def mark_image_viewed(image_id):
         current_user_id = int(get_jwt_identity())
         
         # 이미지 존재 확인
-        image = Image.query.get_or_404(image_id)
+        owner_id = db.session.query(Image.user_id).filter_by(id=image_id).scalar()
+        
+        if owner_id is None:
+            return jsonify({'message': '이미지를 찾을 수 없습니다.'}), 404
         
         # 본인 이미지가 아니면 처리 안 함
-        if image.user_id != current_user_id:
+        if owner_id != current_user_id:
             return jsonify({'message': '본인 이미지만 확인 가능합니다.'}), 403
         
-        # 기존 기록 찾기
-        view = ImageView.query.filter_by(
-            image_id=image_id,
-            user_id=current_user_id
-        ).first()
-        
-        if view:
-            # 이미 기록 있으면 시간 업데이트
-            view.last_viewed_at = get_kst_now()
-        else:
-            # 없으면 새로 생성
-            view = ImageView(
-                image_id=image_id,
-                user_id=current_user_id
-            )
-            db.session.add(view)
-        
-        db.session.commit()
+        # 확인 시간은 버퍼에 기록하고 모아서 한 번에 저장한다 (services/views.py)
+        record_view(current_user_id, image_id)
+        notifications.publish_unread_count(current_user_id)
         
         return jsonify({'message': '확인 완료'}), 200
     except Exception as e:
@@ -0,0 +1,33 @@
+import os
+from services.placeholders import load_preview, placeholder_values, set_placeholder, PLACEHOLDER_COLUMNS
+from services.similarity import dhash_image, set_image_hash, HASH_COLUMNS
+
+# 이미지 분석: 작은 미리보기를 한 번 디코딩해서 지각 해시(services/similarity.py)와
+# 자리 표시 정보(services/placeholders.py)를 함께 계산한다.
+# 디코딩은 요청 스레드에서 하지 않고 'analyze' 작업으로 처리한다 (services/jobs.py).
+# JPEG만 예외로, draft로 1/8 크기까지 줄여 디코딩할 수 있어 업로드 요청 안에서 바로 계산한다
+# (중복 경고를 응답에 바로 넣을 수 있다). 다른 형식은 전체 디코딩이 필요해 작업으로 넘긴다.
+
+QUICK_FORMATS = ('jpg',)  # 줄여서 디코딩할 수 있는 형식 (저장 확장자)
+
+
+# 미리보기 + 원본 크기 -> {'width', 'height', 'blurhash', 'dominant_color', 'phash'}
+def analyze_preview(preview, size):
+    return dict(placeholder_values(preview, size), phash=dhash_image(preview))
+
+
+# 작업 워커 프로세스에서 실행 (run(upload_folder, source_url))
+def analyze_image(upload_folder, image_url):
+    return analyze_preview(*load_preview(os.path.join(upload_folder, image_url)))
+
+
+# 분석 결과를 Image에 반영
+def apply_analysis(image, values):
+    set_image_hash(image, values['phash'])
+    set_placeholder(image, values)
+
+
+# 같은 파일을 쓰는 다른 이미지의 분석 결과 복사
+def copy_analysis(image, source):
+    for name in HASH_COLUMNS + PLACEHOLDER_COLUMNS:
+        setattr(image, name, getattr(source, name))
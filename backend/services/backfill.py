@@ -0,0 +1,38 @@
+import os
+from models import db, Image
+
+# 기존 이미지에 파일에서 계산하는 값(지각 해시, 자리 표시 정보 등) 채우기 공통 처리
+# missing 컬럼이 비어 있는 이미지를 id 순으로 batch_size개씩 읽어 compute(파일 경로)로
+# {컬럼 이름: 값}을 계산하고 UPDATE 한다 (배치마다 커밋).
+# 같은 파일을 쓰는 이미지는 한 번만 계산한다. 파일이 없거나 읽을 수 없는 이미지는 건너뛴다.
+
+
+# 채운 이미지 수 반환 (label은 에러 메시지에 쓰는 값 이름)
+def backfill_images(upload_folder, missing, compute, label, batch_size=200):
+    filled, last_id, computed = 0, 0, {}
+    while True:
+        batch = db.session.query(Image.id, Image.image_url)\
+            .filter(missing.is_(None), Image.id > last_id)\
+            .order_by(Image.id).limit(batch_size).all()
+        if not batch:
+            return filled
+
+        for image_id, image_url in batch:
+            if image_url not in computed:
+                try:
+                    computed[image_url] = compute(os.path.join(upload_folder, image_url))
+                except (OSError, SyntaxError, ValueError, EOFError) as e:
+                    print(f"에러: 이미지 {image_id} {label} 계산 실패: {str(e)}")
+                    computed[image_url] = None
+            values = computed[image_url]
+            if values is None:
+                continue
+
+            # 계산한 값만 채울 때 updated_at(onupdate)이 바뀌지 않도록 현재 값을 그대로 넣는다
+            columns = {getattr(Image, name): value for name, value in values.items()}
+            columns[Image.updated_at] = Image.updated_at
+            Image.query.filter_by(id=image_id).update(columns, synchronize_session=False)
+            filled += 1
+
+        db.session.commit()
+        last_id = batch[-1][0]
@@ -0,0 +1,232 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, g, request, make_response, Response
+from services.replicas import is_sticky_writer
+
+# 공개 조회 API 응답 캐시
+# 키는 엔드포인트 + 쿼리 파라미터 + 태그 버전으로 만든다. 쓰기 요청이 태그 버전을 올리면
+# 예전 버전으로 만든 키는 더 이상 조회되지 않고 LRU/TTL로 자연스럽게 밀려난다.
+#   - local: 프로세스 메모리 LRU + TTL (항목 수/바이트 상한)
+#   - redis: 여러 워커가 함께 쓰는 캐시 (redis 패키지가 설치된 경우에만)
+# 다른 백엔드는 register_backend로 추가한다. CACHE_BACKEND가 None이면 캐시를 쓰지 않는다.
+# 태그: feed(목록), image:<id>, comments:<image_id>, reactions:<image_id>
+# 뷰는 add_cache_tags로 응답에 담긴 이미지의 태그를 더할 수 있다. 이 태그의 버전은 응답과 함께 저장해
+# 두고 꺼낼 때 비교한다 (목록의 댓글 수가 바뀌어도 그 이미지가 들어 있는 페이지만 다시 만든다).
+# 응답을 만든 뒤에 버전을 읽으므로 그 사이에 들어온 쓰기는 TTL 동안 늦게 보일 수 있다.
+# 복제본과 함께 쓸 때 방금 쓴 내용이 보이도록(read-your-writes):
+#   - 최근에 쓰기를 한 사용자(services/replicas.py)는 캐시를 읽지도 채우지도 않는다 (X-Cache: BYPASS)
+#   - 캐시를 채울 응답은 복제본이 아니라 primary에서 읽는다 (지연된 복제본 내용이 TTL 동안 모두에게 나가지 않도록)
+
+
+class LocalCache:
+    def __init__(self, app):
+        self.max_entries = app.config.get('CACHE_MAX_ENTRIES', 1024)
+        self.max_bytes = app.config.get('CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._versions = {}            # 태그 버전은 밀려나면 안 되므로 따로 보관
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, value, size = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def set(self, key, value, ttl):
+        size = len(value[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def version(self, tag):
+        with self._lock:
+            return self._versions.get(tag, 0)
+
+    def bump(self, tag):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes,
+                        maxEntries=self.max_entries, maxBytes=self.max_bytes)
+
+
+class RedisCache:
+    def __init__(self, app):
+        import redis  # 선택 의존성: redis 백엔드를 쓸 때만 필요
+        self._client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+        self._prefix = app.config.get('CACHE_KEY_PREFIX', 'imageboard:cache:')
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        raw = self._client.hmget(self._prefix + key, 'body', 'status', 'mimetype', 'tags')
+        if raw[0] is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return raw[0], int(raw[1]), raw[2].decode('utf-8'), json.loads(raw[3] or '{}')
+
+    def set(self, key, value, ttl):
+        body, status, mimetype, tags = value
+        pipeline = self._client.pipeline()
+        pipeline.hset(self._prefix + key, mapping={'body': body, 'status': status, 'mimetype': mimetype,
+                                                   'tags': json.dumps(tags)})
+        pipeline.expire(self._prefix + key, int(ttl))
+        pipeline.execute()
+
+    def version(self, tag):
+        return int(self._client.get(self._prefix + 'v:' + tag) or 0)
+
+    def versions(self, tags):
+        if not tags:
+            return []
+        return [int(value or 0) for value in self._client.mget([self._prefix + 'v:' + tag for tag in tags])]
+
+    def bump(self, tag):
+        self._client.incr(self._prefix + 'v:' + tag)
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + '*'):
+            self._client.delete(key)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)  # 항목 수/축출은 Redis 서버 통계(INFO)로 본다
+
+
+BACKENDS = {
+    'local': LocalCache,
+    'redis': RedisCache,
+}
+
+
+def register_backend(name, cache_cls):
+    BACKENDS[name] = cache_cls
+
+
+# 현재 앱의 캐시 (CACHE_BACKEND가 None이면 None)
+def get_cache():
+    app = current_app._get_current_object()
+    if 'response_cache' not in app.extensions:
+        backend = app.config.get('CACHE_BACKEND', 'local')
+        app.extensions['response_cache'] = BACKENDS[backend](app) if backend else None
+    return app.extensions['response_cache']
+
+
+def _cache_key(tags, cache):
+    params = urlencode(sorted(request.args.items(multi=True)))
+    versions = ','.join(f'{tag}={version}' for tag, version in zip(tags, cache.versions(tags)))
+    return f'{request.endpoint}?{params}#{versions}'
+
+
+# 응답에 담긴 내용이 의존하는 태그 추가 (캐시를 채우는 요청에서만 의미가 있다)
+def add_cache_tags(*tags):
+    g.setdefault('cache_tags', []).extend(tags)
+
+
+# 저장할 때의 태그 버전이 지금과 같은지
+def _tags_current(cache, tags):
+    return list(tags.values()) == cache.versions(list(tags))
+
+
+# 조회 뷰 응답 캐시 데코레이터
+# tags는 뷰 인자를 받아 이 응답이 의존하는 태그 목록을 돌려주는 함수. 200 응답만 저장한다.
+def cached_response(tags, ttl=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return view(*args, **kwargs)
+            if is_sticky_writer():
+                response = make_response(view(*args, **kwargs))
+                response.headers['X-Cache'] = 'BYPASS'
+                return response
+
+            key = _cache_key(tags(**kwargs), cache)
+            hit = cache.get(key)
+            if hit is not None and _tags_current(cache, hit[3]):
+                body, status, mimetype, _ = hit
+                response = Response(body, status=status, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            g.use_replica = False  # 캐시에 채울 응답은 primary에서 읽는다
+            g.cache_tags = []
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                content_tags = list(dict.fromkeys(g.cache_tags))
+                content_versions = dict(zip(content_tags, cache.versions(content_tags)))
+                cache.set(key, (response.get_data(), response.status_code, response.mimetype, content_versions),
+                          ttl or current_app.config.get('CACHE_DEFAULT_TTL', 30))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate(*tags):
+    cache = get_cache()
+    if cache is None:
+        return
+    for tag in tags:
+        cache.bump(tag)
+
+
+# 이미지 정보(제목, 썸네일, 댓글 수 등)가 바뀌었을 때
+def invalidate_image(image_id):
+    invalidate('feed', f'image:{image_id}')
+
+
+# 댓글이 추가/삭제되었을 때
+# 목록의 댓글 수도 바뀌지만 feed 전체가 아니라 이 이미지가 들어 있는 페이지만 image 태그로 무효화된다
+def invalidate_comments(image_id):
+    invalidate(f'image:{image_id}', f'comments:{image_id}')
+
+
+def invalidate_reactions(image_id):
+    invalidate(f'reactions:{image_id}')
@@ -0,0 +1,110 @@
+from sqlalchemy import or_, and_, func, select
+from models import db, Comment, User
+from services.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+# 이미지별 댓글 목록
+# 작성자 닉네임을 댓글과 함께 한 번의 쿼리로 가져오고, (created_at, id) 키셋으로 페이지를 나눈다.
+# 정렬은 오래된 순(asc, 기본값)과 최신 순(desc)을 지원한다.
+
+COMMENT_ORDERS = ('asc', 'desc')
+
+
+# 댓글 + 작성자 닉네임 쿼리
+def comment_query(image_id):
+    return db.session.query(Comment, User.nickname.label('nickname'))\
+        .outerjoin(User, User.id == Comment.user_id)\
+        .filter(Comment.image_id == image_id)
+
+
+# 커서 다음 limit + 1개 쿼리 (다음 페이지 존재 여부 확인용으로 하나 더)
+def comment_page_query(image_id, cursor, limit, order='asc'):
+    if order not in COMMENT_ORDERS:
+        raise InvalidCursor('order must be asc or desc')
+    query = comment_query(image_id)
+
+    if cursor:
+        keys = decode_cursor(cursor, datetime_keys=('createdAt',))
+        created_at, last_id = keys['createdAt'], keys.get('id')
+        if not isinstance(last_id, int):
+            raise InvalidCursor('cursor id must be an integer')
+        if order == 'asc':
+            query = query.filter(or_(
+                Comment.created_at > created_at,
+                and_(Comment.created_at == created_at, Comment.id > last_id),
+            ))
+        else:
+            query = query.filter(or_(
+                Comment.created_at < created_at,
+                and_(Comment.created_at == created_at, Comment.id < last_id),
+            ))
+
+    if order == 'asc':
+        query = query.order_by(Comment.created_at.asc(), Comment.id.asc())
+    else:
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+    return query.limit(limit + 1)
+
+
+# 댓글 페이지 조회 후 (행 목록, 다음 커서) 반환
+def comment_page(image_id, cursor, limit, order='asc'):
+    rows = comment_page_query(image_id, cursor, limit, order).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Comment
+        next_cursor = encode_cursor(createdAt=last.created_at, id=last.id)
+
+    return rows, next_cursor
+
+
+# 댓글 한 개를 API 응답 형태로 변환
+def serialize_comment(comment, nickname):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'userId': comment.user_id,
+        'username': nickname or '알 수 없음',
+        'createdAt': comment.created_at.isoformat()
+    }
+
+
+# 여러 이미지의 첫 페이지(오래된 순) 쿼리
+# 이미지별 순번(ROW_NUMBER)을 매겨 limit + 1번째까지만 가져온다.
+def first_comment_pages_query(image_ids, limit):
+    ranked = select(
+        Comment.id.label('id'),
+        func.row_number().over(
+            partition_by=Comment.image_id,
+            order_by=(Comment.created_at.asc(), Comment.id.asc()),
+        ).label('position'),
+    ).where(Comment.image_id.in_(image_ids)).subquery()
+
+    return db.session.query(Comment, User.nickname.label('nickname'))\
+        .join(ranked, ranked.c.id == Comment.id)\
+        .outerjoin(User, User.id == Comment.user_id)\
+        .filter(ranked.c.position <= limit + 1)\
+        .order_by(Comment.image_id, Comment.created_at.asc(), Comment.id.asc())
+
+
+# 여러 이미지의 첫 페이지를 한 번의 쿼리로 조회 {image_id: (행 목록, 다음 커서)}
+def first_comment_pages(image_ids, limit):
+    pages = {image_id: ([], None) for image_id in image_ids}
+    if not pages:
+        return pages
+
+    rows = first_comment_pages_query(list(pages), limit).all()
+
+    grouped = {image_id: [] for image_id in pages}
+    for row in rows:
+        grouped[row.Comment.image_id].append(row)
+
+    for image_id, image_rows in grouped.items():
+        next_cursor = None
+        if len(image_rows) > limit:
+            image_rows = image_rows[:limit]
+            last = image_rows[-1].Comment
+            next_cursor = encode_cursor(createdAt=last.created_at, id=last.id)
+        pages[image_id] = (image_rows, next_cursor)
+
+    return pages
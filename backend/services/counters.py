@@ -0,0 +1,91 @@
+from sqlalchemy import func, select, insert, delete
+from models import db, Image, Comment, Reaction, ImageReactionCount
+from services.upsert import upsert
+
+# Image의 비정규화 카운터 (comment_count, last_comment_at)와 이미지별 이모티콘 개수 관리
+# 댓글/반응을 쓰는 요청과 같은 트랜잭션 안에서 원자적 UPDATE로 갱신하고,
+# 어긋났을 때는 repair_counters()로 원본 행에서 다시 계산한다.
+
+
+# 카운터만 바꿀 때 updated_at(onupdate)이 같이 바뀌지 않도록 현재 값을 그대로 넣는다
+def _update_image(image_id, values):
+    values[Image.updated_at] = Image.updated_at
+    Image.query.filter_by(id=image_id).update(values, synchronize_session=False)
+
+
+# 댓글 추가 후
+def comment_added(image_id, created_at):
+    _update_image(image_id, {
+        Image.comment_count: Image.comment_count + 1,
+        Image.last_comment_at: created_at,
+    })
+
+
+# 댓글 삭제 후 (삭제가 flush된 뒤에 호출해야 마지막 댓글 시간이 맞게 계산된다)
+def comment_removed(image_id):
+    last_comment_at = select(func.max(Comment.created_at))\
+        .where(Comment.image_id == image_id)\
+        .scalar_subquery()
+    _update_image(image_id, {
+        Image.comment_count: Image.comment_count - 1,
+        Image.last_comment_at: last_comment_at,
+    })
+
+
+def _change_reaction_count(image_id, emoji, delta):
+    return ImageReactionCount.query.filter_by(image_id=image_id, emoji=emoji)\
+        .update({ImageReactionCount.count: ImageReactionCount.count + delta},
+                synchronize_session=False)
+
+
+# 반응 추가 후 (개수 행이 없으면 1로 만들고, 있으면 1 증가)
+def reaction_added(image_id, emoji):
+    upsert(ImageReactionCount,
+           {'image_id': image_id, 'emoji': emoji, 'count': 1},
+           ['image_id', 'emoji'],
+           {'count': ImageReactionCount.count + 1})
+
+
+# 반응 제거 후 (0개가 되면 행 삭제)
+def reaction_removed(image_id, emoji):
+    _change_reaction_count(image_id, emoji, -1)
+    ImageReactionCount.query.filter(
+        ImageReactionCount.image_id == image_id,
+        ImageReactionCount.emoji == emoji,
+        ImageReactionCount.count <= 0
+    ).delete(synchronize_session=False)
+
+
+# 이미지의 이모티콘별 개수 {"👍": 4, ...}
+def reaction_counts(image_id):
+    rows = db.session.query(ImageReactionCount.emoji, ImageReactionCount.count)\
+        .filter_by(image_id=image_id).all()
+    return {emoji: count for emoji, count in rows}
+
+
+# 원본 행(comments, reactions)에서 모든 카운터 다시 계산
+def repair_counters():
+    comment_count = select(func.count(Comment.id))\
+        .where(Comment.image_id == Image.id)\
+        .scalar_subquery()
+    last_comment_at = select(func.max(Comment.created_at))\
+        .where(Comment.image_id == Image.id)\
+        .scalar_subquery()
+    db.session.execute(
+        Image.__table__.update().values(
+            comment_count=comment_count,
+            last_comment_at=last_comment_at,
+            updated_at=Image.__table__.c.updated_at,
+        )
+    )
+
+    db.session.execute(delete(ImageReactionCount))
+    db.session.execute(
+        insert(ImageReactionCount).from_select(
+            ['image_id', 'emoji', 'count'],
+            select(Reaction.image_id, Reaction.emoji, func.count(Reaction.id))
+            .group_by(Reaction.image_id, Reaction.emoji)
+        )
+    )
+
+    db.session.commit()
@@ -0,0 +1,96 @@
+import mimetypes
+import os
+import re
+from flask import current_app, request, send_from_directory, abort, Response
+from werkzeug.security import safe_join
+from services.transcode import TRANSCODE_FORMATS, TRANSCODE_MIMETYPES, variant_filename, clean_filename
+
+# 업로드 파일 응답 (캐시 헤더, 조건부 요청, Range)
+# 내용 해시로 이름 지은 파일(ab/cd/<sha256>...)은 이름이 바뀌지 않는 한 내용도 바뀌지 않으므로
+# 해시를 강한 ETag로 쓰고 1년짜리 immutable 캐시를 준다.
+# 예전 방식 파일은 짧게 캐시하고 매번 재검증한다.
+# 원본 요청은 Accept 헤더에 따라 같은 주소로 AVIF/WebP 변환본을 보낸다 (Vary: Accept).
+# 변환본을 보내지 않을 때는 메타데이터(EXIF 위치 정보 등)를 뺀 사본을 보낸다.
+# 변환 작업이 끝나기 전(사본이 아직 없을 때)에만 업로드된 원본 그대로 나간다.
+
+CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/(?P<tag>[0-9a-f]{64}(?:_[a-z0-9]+)*)\.[a-z0-9]+$')
+ORIGINAL = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+LEGACY_MAX_AGE = 60 * 60
+
+
+# 파일명 -> (ETag, 캐시 시간, immutable 여부)
+def cache_policy(filename):
+    matched = CONTENT_ADDRESSED.match(filename)
+    if matched:
+        return matched.group('tag'), IMMUTABLE_MAX_AGE, True
+    return True, LEGACY_MAX_AGE, False  # ETag는 Flask 기본값(mtime/크기 기반)
+
+
+def _apply_cache_headers(response, immutable, max_age, negotiated=False):
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+
+def _exists(folder, filename):
+    path = safe_join(folder, filename)
+    return path is not None and os.path.isfile(path)
+
+
+# 원본 요청에 보낼 파일 선택: 클라이언트가 명시적으로 받는 형식 중 변환본이 있는 첫 번째
+# (*/* 만 보내는 클라이언트나 변환본이 없으면 메타데이터를 뺀 사본, 그것도 없으면 원본)
+def negotiate_variant(folder, filename):
+    accepted = {value for value, quality in request.accept_mimetypes if quality > 0}
+    for fmt in TRANSCODE_FORMATS:
+        if TRANSCODE_MIMETYPES[fmt] not in accepted or filename.endswith(f'.{fmt}'):
+            continue
+        variant = variant_filename(filename, fmt)
+        if _exists(folder, variant):
+            return variant, fmt
+    clean = clean_filename(filename)
+    if _exists(folder, clean):
+        return clean, None
+    return filename, None
+
+
+# X-Accel-Redirect 응답: 본문 없이 헤더만 주고 nginx가 파일을 직접 보낸다
+def _accel_redirect(folder, filename, etag, max_age, immutable, negotiated):
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    prefix = current_app.config['X_ACCEL_REDIRECT_PREFIX'].rstrip('/')
+    response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.headers['X-Accel-Redirect'] = f'{prefix}/{filename}'
+    stat = os.stat(path)
+    response.last_modified = stat.st_mtime
+    response.set_etag(etag if isinstance(etag, str) else f'{int(stat.st_mtime)}-{stat.st_size}')
+    _apply_cache_headers(response, immutable, max_age, negotiated)
+    return response.make_conditional(request, accept_ranges=False)
+
+
+# 업로드 파일 응답
+# USE_X_SENDFILE(Flask 기본 설정)이 켜져 있으면 X-Sendfile 헤더로,
+# X_ACCEL_REDIRECT_PREFIX가 있으면 X-Accel-Redirect로 웹 서버에 전송을 넘긴다.
+# folder는 create_app에서 절대 경로로 바꾼 UPLOAD_FOLDER.
+def send_upload(folder, filename):
+    negotiated, fmt, original = bool(ORIGINAL.match(filename)), None, filename
+    if negotiated:
+        filename, fmt = negotiate_variant(folder, filename)
+    etag, max_age, immutable = cache_policy(filename)
+    if negotiated and filename == original:
+        # 사본이 생기면 같은 주소의 응답이 바뀌므로 원본 그대로는 오래 캐시하지 않는다
+        max_age, immutable = LEGACY_MAX_AGE, False
+    if fmt:
+        etag = f'{etag}_{fmt}'  # 형식마다 다른 ETag (같은 주소의 다른 표현)
+
+    if current_app.config.get('X_ACCEL_REDIRECT_PREFIX'):
+        return _accel_redirect(folder, filename, etag, max_age, immutable, negotiated)
+
+    response = send_from_directory(folder, filename, etag=etag, max_age=max_age, conditional=True)
+    return _apply_cache_headers(response, immutable, max_age, negotiated)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+
+# 업로드 원본으로부터 피드용 고정 폭 WebP 썸네일을 만든다
+# 파일은 원본과 같은 폴더에 {원본 이름}_w{폭}.webp 로 저장된다.
+# 썸네일은 오래 캐시되므로(immutable) 임시 파일에 다 쓴 뒤 rename 해서 반쯤 쓴 파일이 나가지 않게 한다.
+# Pillow는 썸네일을 실제로 만들 때(작업 워커)만 불러와서 웹 워커 부팅을 가볍게 한다.
+
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+
+
+# 원본 파일명 + 폭 -> 썸네일 파일명
+def derivative_filename(image_url, width):
+    stem = image_url.rsplit('.', 1)[0]
+    return f'{stem}_w{width}.webp'
+
+
+# 썸네일 생성 후 만들어진 폭 목록 반환
+# 원본보다 큰 폭은 확대하지 않고 원본 크기로 한 번만 만든다.
+def generate_derivatives(upload_folder, image_url):
+    from PIL import Image as PILImage, ImageOps
+
+    source_path = os.path.join(upload_folder, image_url)
+    widths = []
+
+    with PILImage.open(source_path) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'RGBA'):
+            has_alpha = source.mode in ('LA', 'PA') or 'transparency' in source.info
+            source = source.convert('RGBA' if has_alpha else 'RGB')
+
+        for width in DERIVATIVE_WIDTHS:
+            if widths and source.width <= widths[-1]:
+                break
+
+            if source.width > width:
+                height = max(1, round(source.height * width / source.width))
+                resized = source.resize((width, height), PILImage.LANCZOS)
+            else:
+                resized = source
+
+            _save_webp(resized, os.path.join(upload_folder, derivative_filename(image_url, width)))
+            widths.append(width)
+
+    return widths
+
+
+# 같은 폴더의 임시 파일에 저장 후 최종 경로로 교체
+def _save_webp(image, path):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.derivative-')
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            image.save(temp, 'WEBP', quality=WEBP_QUALITY, method=4)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# 썸네일 파일 삭제
+def remove_derivatives(upload_folder, image_url):
+    for width in DERIVATIVE_WIDTHS:
+        path = os.path.join(upload_folder, derivative_filename(image_url, width))
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# 저장된 폭 문자열("320,640") -> [320, 640]
+def parse_widths(value):
+    return [int(width) for width in value.split(',') if width] if value else []
+
+
+# [320, 640] -> "320,640"
+def format_widths(widths):
+    return ','.join(str(width) for width in widths) or None
@@ -0,0 +1,222 @@
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import timedelta
+from flask import current_app
+from models import db, NotificationEvent, get_kst_now
+
+# 알림 실시간 전송용 pub/sub 허브
+# 같은 프로세스 안의 SSE 연결들에는 _LocalFanout이 사용자별 큐로 이벤트를 나눠준다.
+#   - memory: 프로세스 하나에서만 동작. 최근 이벤트를 메모리에 보관해 Last-Event-ID 재연결을 지원한다.
+#   - database: notification_events 테이블을 거쳐 여러 gunicorn 워커에 이벤트를 전달한다.
+#               프로세스마다 스레드 하나가 새 행을 주기적으로 읽어 로컬 구독자에게 나눠준다.
+#               id는 커밋 순서와 다를 수 있어(먼저 id를 받은 트랜잭션이 늦게 커밋) 마지막 id보다
+#               EVENT_POLL_WINDOW개 앞에서부터 다시 읽고, 이미 전달한 id는 건너뛴다.
+# 다른 백엔드(예: Redis pub/sub)는 register_backend로 추가한다.
+
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_BUFFER_SIZE = 50
+
+
+class Subscription:
+    def __init__(self, fanout, user_id):
+        self.fanout = fanout
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    # 다음 이벤트 (timeout 동안 없으면 None)
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.fanout.remove(self)
+
+
+class _LocalFanout:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def add(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def remove(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def user_ids(self):
+        with self._lock:
+            return set(self._subscribers)
+
+    def deliver(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                pass  # 느린 연결은 이벤트를 건너뛴다 (재연결 시 전체 개수를 다시 받는다)
+
+
+def _event(event_id, event_type, data):
+    return {'id': event_id, 'type': event_type, 'data': data}
+
+
+class MemoryEventHub:
+    def __init__(self, app):
+        self.fanout = _LocalFanout()
+        self._lock = threading.Lock()
+        self._epoch = uuid.uuid4().hex[:8]  # 프로세스가 바뀌면 예전 id로는 이어받을 수 없다
+        self._sequence = itertools.count(1)
+        self._recent = defaultdict(lambda: deque(maxlen=REPLAY_BUFFER_SIZE))
+
+    def publish(self, user_id, event_type, data):
+        with self._lock:
+            sequence = next(self._sequence)
+            event = _event(f'{self._epoch}-{sequence}', event_type, data)
+            self._recent[user_id].append((sequence, event))
+        self.fanout.deliver(user_id, event)
+
+    def subscribe(self, user_id):
+        return self.fanout.add(user_id)
+
+    # last_event_id 이후 놓친 이벤트 목록 (이어받을 수 없으면 None)
+    def replay(self, user_id, last_event_id):
+        epoch, _, sequence = (last_event_id or '').partition('-')
+        if epoch != self._epoch or not sequence.isdigit():
+            return None
+        last_sequence = int(sequence)
+
+        with self._lock:
+            recent = list(self._recent.get(user_id, ()))
+        if recent and recent[0][0] > last_sequence + 1:
+            return None  # 버퍼보다 오래된 id
+        return [event for seq, event in recent if seq > last_sequence]
+
+
+class DatabaseEventHub:
+    def __init__(self, app):
+        self.app = app
+        self.fanout = _LocalFanout()
+        self.poll_interval = app.config.get('EVENT_POLL_INTERVAL', 1.0)
+        self.retention = timedelta(seconds=app.config.get('EVENT_RETENTION_SECONDS', 3600))
+        self.window = app.config.get('EVENT_POLL_WINDOW', 100)
+        self._lock = threading.Lock()
+        self._poller = None
+        self._last_id = 0
+        self._delivered = set()  # 다시 읽는 구간에서 이미 전달한 id
+
+    def publish(self, user_id, event_type, data):
+        db.session.add(NotificationEvent(user_id=user_id, event_type=event_type, data=json.dumps(data)))
+        db.session.commit()
+
+    def subscribe(self, user_id):
+        if self._poller is None:
+            self._start()
+        return self.fanout.add(user_id)
+
+    def replay(self, user_id, last_event_id):
+        if not (last_event_id or '').isdigit():
+            return None
+        rows = NotificationEvent.query\
+            .filter(NotificationEvent.user_id == user_id, NotificationEvent.id > int(last_event_id))\
+            .order_by(NotificationEvent.id).limit(REPLAY_BUFFER_SIZE + 1).all()
+        if len(rows) > REPLAY_BUFFER_SIZE:
+            return None
+        return [self._row_event(row) for row in rows]
+
+    @staticmethod
+    def _row_event(row):
+        return _event(str(row.id), row.event_type, json.loads(row.data))
+
+    def _start(self):
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._last_id = db.session.query(db.func.max(NotificationEvent.id)).scalar() or 0
+            self._delivered = {event_id for (event_id,) in db.session.query(NotificationEvent.id)
+                               .filter(NotificationEvent.id > self._last_id - self.window)}
+            self._poller = threading.Thread(target=self._poll, name='notification-events', daemon=True)
+            self._poller.start()
+
+    # 새 이벤트를 읽어 로컬 구독자에게 전달 (늦게 커밋된 행도 window 안이면 전달한다)
+    def _poll_once(self):
+        user_ids = self.fanout.user_ids()
+        rows = NotificationEvent.query.filter(NotificationEvent.id > self._last_id - self.window)\
+            .order_by(NotificationEvent.id).limit(self.window + 500).all()
+        for row in rows:
+            if row.id in self._delivered:
+                continue
+            self._delivered.add(row.id)
+            self._last_id = max(self._last_id, row.id)
+            if row.user_id in user_ids:
+                self.fanout.deliver(row.user_id, self._row_event(row))
+        self._delivered = {event_id for event_id in self._delivered if event_id > self._last_id - self.window}
+
+    # 주기마다 새 app context(= 새 트랜잭션)로 새 이벤트 조회, 오래된 이벤트 정리
+    def _poll(self):
+        last_cleanup = time.monotonic()
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self.app.app_context():
+                    self._poll_once()
+
+                    if time.monotonic() - last_cleanup > self.retention.total_seconds():
+                        NotificationEvent.query\
+                            .filter(NotificationEvent.created_at < get_kst_now() - self.retention)\
+                            .delete(synchronize_session=False)
+                        db.session.commit()
+                        last_cleanup = time.monotonic()
+            except Exception as e:
+                print(f"알림 이벤트 조회 에러: {str(e)}")
+
+
+BACKENDS = {
+    'memory': MemoryEventHub,
+    'database': DatabaseEventHub,
+}
+
+
+def register_backend(name, hub_cls):
+    BACKENDS[name] = hub_cls
+
+
+# 현재 앱의 이벤트 허브
+def get_hub():
+    app = current_app._get_current_object()
+    if 'notification_events' not in app.extensions:
+        app.extensions['notification_events'] = BACKENDS[app.config.get('EVENT_HUB_BACKEND', 'memory')](app)
+    return app.extensions['notification_events']
+
+
+def publish(user_id, event_type, data):
+    try:
+        get_hub().publish(user_id, event_type, data)
+    except Exception as e:
+        # 실시간 알림 실패가 원래 요청을 실패시키지 않도록 한다
+        db.session.rollback()
+        print(f"알림 이벤트 발행 에러: {str(e)}")
+
+
+# SSE 메시지 한 개 (id가 없는 이벤트는 Last-Event-ID를 바꾸지 않는다)
+def format_sse(event):
+    data = json.dumps(event['data'], ensure_ascii=False)
+    message = f"event: {event['type']}\ndata: {data}\n\n"
+    if event.get('id'):
+        message = f"id: {event['id']}\n" + message
+    return message
@@ -0,0 +1,107 @@
+from sqlalchemy import func, or_, and_, text
+from models import db, Image, User
+from services.derivatives import derivative_filename, parse_widths
+from services.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+# 피드/검색/상세 조회가 함께 쓰는 쿼리 계층
+# 작성자 닉네임을 이미지 한 행과 함께 한 번의 쿼리로 가져온다.
+# 댓글 수와 마지막 댓글 시간은 Image의 비정규화 카운터(services/counters.py)를 읽는다.
+
+IMAGE_FILE_URL = 'http://localhost:5000/api/images/files/'
+POSTER_WIDTH = 640
+
+
+# 이미지 + 작성자를 한 행으로 조회하는 기본 쿼리
+def feed_query():
+    return db.session.query(
+        Image,
+        User.nickname.label('nickname'),
+        User.username.label('username'),
+    ).join(User, User.id == Image.user_id)
+
+
+# 이미지의 썸네일 URL 목록 ({"320": url, ...})
+def thumbnail_urls(image):
+    return {
+        str(width): f'{IMAGE_FILE_URL}{derivative_filename(image.image_url, width)}'
+        for width in parse_widths(image.derivative_widths)
+    }
+
+
+# 움직이는 이미지의 피드 그리드용 정지 포스터 URL (첫 프레임 썸네일, 정지 이미지나 썸네일 생성 전이면 None)
+def poster_url(image):
+    widths = parse_widths(image.derivative_widths)
+    if (image.frame_count or 1) <= 1 or not widths:
+        return None
+    width = max((w for w in widths if w <= POSTER_WIDTH), default=widths[0])
+    return f'{IMAGE_FILE_URL}{derivative_filename(image.image_url, width)}'
+
+
+# 조회 결과 한 행을 API 응답 형태로 변환
+def serialize_feed_row(row):
+    image = row.Image
+    last_comment_at = image.last_comment_at or image.created_at
+
+    return {
+        'id': image.id,
+        'title': image.title,
+        'description': image.description,
+        'imageUrl': f'{IMAGE_FILE_URL}{image.image_url}',
+        'thumbnails': thumbnail_urls(image),
+        'width': image.width,
+        'height': image.height,
+        'blurhash': image.blurhash,
+        'dominantColor': image.dominant_color,
+        'animated': (image.frame_count or 1) > 1,
+        'posterUrl': poster_url(image),
+        'userId': image.user_id,
+        'username': row.nickname,
+        'createdAt': image.created_at.isoformat(),
+        'commentCount': image.comment_count,
+        'lastCommentAt': last_comment_at.isoformat(),
+    }
+
+
+# 키셋 페이지네이션 쿼리: (created_at, id) 내림차순으로 커서 다음 limit + 1개
+# (다음 페이지 존재 여부를 알기 위해 하나 더 가져온다)
+def feed_page_query(cursor, limit, query=None):
+    query = query if query is not None else feed_query()
+
+    if cursor:
+        keys = decode_cursor(cursor, datetime_keys=('createdAt',))
+        created_at, last_id = keys['createdAt'], keys.get('id')
+        if not isinstance(last_id, int):
+            raise InvalidCursor('cursor id must be an integer')
+        query = query.filter(or_(
+            Image.created_at < created_at,
+            and_(Image.created_at == created_at, Image.id < last_id),
+        ))
+
+    return query.order_by(Image.created_at.desc(), Image.id.desc()).limit(limit + 1)
+
+
+# 키셋 페이지 조회 후 (행 목록, 다음 커서) 반환
+def feed_page_after(cursor, limit, query=None):
+    rows = feed_page_query(cursor, limit, query).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Image
+        next_cursor = encode_cursor(createdAt=last.created_at, id=last.id)
+
+    return rows, next_cursor
+
+
+# 전체 이미지 수 (근사값)
+# MySQL은 information_schema의 통계값을 써서 COUNT(*) 풀스캔을 피하고, 그 외 DB는 실제 개수를 센다.
+def approximate_image_count():
+    if db.engine.dialect.name == 'mysql':
+        estimate = db.session.execute(text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        ), {'table': Image.__tablename__}).scalar()
+        if estimate is not None:
+            return int(estimate)
+
+    return db.session.query(func.count(Image.id)).scalar()
@@ -0,0 +1,229 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from flask import current_app
+from models import db, Image, ImageJob, get_kst_now
+from services.derivatives import generate_derivatives, format_widths
+from services.transcode import transcode_image, format_sizes
+from services.analysis import analyze_image, apply_analysis
+from services.storage import discard_derivatives, discard_variants
+from services import cache
+
+# 이미지 후처리 작업 큐
+# 업로드 요청은 파일 저장 + 작업 등록(ImageJob 행)까지만 하고 바로 응답한다.
+# 실제 디코딩/리사이즈 같은 CPU 작업은 백엔드가 처리한다.
+#   - inprocess: 크기 제한 큐 + 디스패처 스레드 + 워커 프로세스 풀 (기본값, 외부 브로커 불필요)
+#     큐가 가득 차면 작업은 pending으로 남겨 두고, 스위퍼 스레드가 큐가 빌 때 다시 넣는다.
+#     워커가 죽어 running에 멈춘 작업(JOB_STALE_SECONDS 동안 변화 없음)도 스위퍼가 다시 대기시킨다.
+#     요청 스레드에서는 디코딩/인코딩을 하지 않는다.
+#   - inline: 요청 스레드에서 바로 실행 (테스트/개발용)
+# 다른 백엔드(예: 외부 큐)는 register_backend로 추가한다.
+
+
+# 작업 종류 등록
+# run(upload_folder, source_url)은 워커 프로세스에서 실행되므로 모듈 최상위 함수여야 한다.
+# apply(image, result)는 결과를 Image에 반영하고, discard(upload_folder, source_url)는
+# 이미지가 지워지거나 교체되어 결과를 버릴 때 만들어진 파일을 정리한다.
+JOB_KINDS = {}
+
+
+def register_job_kind(kind, run, apply, discard=None):
+    JOB_KINDS[kind] = {'run': run, 'apply': apply, 'discard': discard}
+
+
+def _apply_derivatives(image, widths):
+    image.derivative_widths = format_widths(widths)
+
+
+def _apply_transcode(image, sizes):
+    image.transcoded_sizes = format_sizes(sizes)
+
+
+register_job_kind('analyze', analyze_image, apply_analysis)
+register_job_kind('derivatives', generate_derivatives, _apply_derivatives, discard_derivatives)
+register_job_kind('transcode', transcode_image, _apply_transcode, discard_variants)
+
+
+# 작업 하나 처리: pending -> running 선점 후 실행, 결과 반영
+# 여러 워커가 같은 작업을 받아도 선점에 성공한 하나만 실행한다.
+def process_job(job_id, execute):
+    claimed = ImageJob.query.filter_by(id=job_id, status='pending')\
+        .update({'status': 'running', 'updated_at': _now()}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return
+
+    job = db.session.get(ImageJob, job_id)
+    kind = JOB_KINDS[job.kind]
+    image_id, source_url = job.image_id, job.source_url
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+
+    try:
+        result = execute(kind['run'], upload_folder, source_url)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ImageJob, job_id)
+        if job is not None:
+            job.status = 'failed'
+            job.error = str(e)
+            db.session.commit()
+        return
+
+    job = db.session.get(ImageJob, job_id)
+    image = db.session.get(Image, image_id)
+
+    # 처리 중에 이미지가 삭제/교체되었으면 결과를 버린다
+    if job is None or image is None or image.image_url != source_url:
+        if kind['discard']:
+            kind['discard'](upload_folder, source_url)
+        if job is not None:
+            job.status = 'failed'
+            job.error = 'image was replaced or deleted'
+            db.session.commit()
+        return
+
+    kind['apply'](image, result)
+    job.status = 'done'
+    job.error = None
+    db.session.commit()
+    cache.invalidate_image(image_id)  # 목록/상세에 썸네일 주소가 생겼다
+
+
+def _now():
+    return get_kst_now().replace(tzinfo=None)
+
+
+# 큐에 다시 넣을 작업 id 목록 (최대 limit개)
+# 오래 running에 머문 작업은 pending으로 되돌린다 (상태가 그대로일 때만, 다른 스위퍼와 겹쳐도 한 번만)
+def sweep_jobs(stale_seconds, limit):
+    stale_before = _now() - timedelta(seconds=stale_seconds)
+    ImageJob.query.filter(ImageJob.status == 'running', ImageJob.updated_at < stale_before)\
+        .update({'status': 'pending', 'updated_at': _now()}, synchronize_session=False)
+    db.session.commit()
+
+    return [job_id for (job_id,) in db.session.query(ImageJob.id)
+            .filter_by(status='pending').order_by(ImageJob.id).limit(limit)]
+
+
+def _execute_here(run, *args):
+    return run(*args)
+
+
+class InlineJobBackend:
+    def __init__(self, app):
+        self.app = app
+
+    def submit(self, job_id):
+        process_job(job_id, _execute_here)
+
+
+class InProcessJobBackend:
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config.get('JOB_WORKERS', 2)
+        self.queue = queue.Queue(maxsize=app.config.get('JOB_QUEUE_SIZE', 100))
+        self.sweep_interval = app.config.get('JOB_SWEEP_INTERVAL', 30)
+        self.stale_seconds = app.config.get('JOB_STALE_SECONDS', 600)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._overflowed = False
+        self._executor = None
+
+    # 첫 작업이 들어올 때 프로세스 풀, 디스패처 스레드, 스위퍼 스레드를 띄운다 (임포트/포크 시점 부담 없음)
+    # 이전 프로세스가 남긴 대기 작업은 스위퍼가 바로 한 번 훑어서 넣는다 (요청 스레드에서 하지 않음).
+    def _start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            context = multiprocessing.get_context(self.app.config.get('JOB_START_METHOD', 'spawn'))
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            for i in range(self.workers):
+                threading.Thread(target=self._dispatch, name=f'image-job-{i}', daemon=True).start()
+            threading.Thread(target=self._sweep, name='image-job-sweeper', daemon=True).start()
+
+    # 큐가 가득 차면 넣지 않는다 (작업 행은 pending으로 남아 스위퍼가 나중에 넣는다)
+    def _put(self, job_id):
+        try:
+            self.queue.put_nowait(job_id)
+        except queue.Full:
+            self._overflowed = True
+            print(f"작업 큐가 가득 차 나중에 처리합니다: job {job_id}")
+
+    # 큐가 비어 있을 때만 pending 작업을 넣는다 (이미 큐에 있는 작업을 중복으로 넣지 않도록)
+    def _sweep(self):
+        while True:
+            if self.queue.empty():
+                try:
+                    with self.app.app_context():
+                        job_ids = sweep_jobs(self.stale_seconds, self.queue.maxsize)
+                    for job_id in job_ids:
+                        self._put(job_id)
+                except Exception as e:
+                    print(f"작업 스위프 에러: {str(e)}")
+            self._wakeup.wait(self.sweep_interval)
+            self._wakeup.clear()
+
+    def _execute(self, run, *args):
+        return self._executor.submit(run, *args).result()
+
+    def _dispatch(self):
+        while True:
+            job_id = self.queue.get()
+            try:
+                with self.app.app_context():
+                    process_job(job_id, self._execute)
+            except Exception as e:
+                print(f"작업 처리 에러: job {job_id}: {str(e)}")
+            finally:
+                self.queue.task_done()
+                # 넣지 못한 작업이 있었으면 큐가 빌 때 스위퍼를 바로 깨운다
+                if self._overflowed and self.queue.empty():
+                    self._overflowed = False
+                    self._wakeup.set()
+
+    def submit(self, job_id):
+        if self._executor is None:
+            self._start()
+        self._put(job_id)
+
+
+BACKENDS = {
+    'inprocess': InProcessJobBackend,
+    'inline': InlineJobBackend,
+}
+
+
+def register_backend(name, backend_cls):
+    BACKENDS[name] = backend_cls
+
+
+# 현재 앱의 작업 백엔드
+def get_backend():
+    app = current_app._get_current_object()
+    if 'image_jobs' not in app.extensions:
+        app.extensions['image_jobs'] = BACKENDS[app.config.get('JOB_BACKEND', 'inprocess')](app)
+    return app.extensions['image_jobs']
+
+
+# 이미지에 대한 작업 등록 (커밋 전 세션에 추가만 한다)
+def create_job(image, kind='derivatives'):
+    job = ImageJob(image=image, kind=kind, source_url=image.image_url, status='pending')
+    db.session.add(job)
+    return job
+
+
+# 커밋된 작업을 백엔드에 넘긴다
+def submit_jobs(jobs):
+    backend = get_backend()
+    for job in jobs:
+        backend.submit(job.id)
+
+
+# 이미지의 작업 종류별 가장 최근 작업 {kind: job}
+def latest_jobs(image_id):
+    jobs = {}
+    for job in ImageJob.query.filter_by(image_id=image_id).order_by(ImageJob.id.desc()):
+        jobs.setdefault(job.kind, job)
+    return jobs
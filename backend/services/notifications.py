@@ -0,0 +1,154 @@
+from sqlalchemy import func, select, and_, or_
+from models import db, User, Image, Comment, ImageView
+from services import events
+from services.feed import feed_page_query, IMAGE_FILE_URL
+from services.pagination import encode_cursor
+from services.views import last_viewed_expression, pending_views
+
+# 읽지 않은 댓글 알림
+# "내 이미지에 달린, 내가 쓰지 않은, 마지막 확인 이후의 댓글"을 images/comments/image_views
+# 조인 한 번으로 구하고, 정렬과 LIMIT도 SQL에서 처리한다.
+# 개수는 users.unread_comment_count에 캐시한다. 댓글이 달리면 1 증가, 확인/삭제 등으로
+# 정확히 알 수 없게 되면 NULL로 무효화하고 다음 조회 때 다시 계산한다.
+# 마지막 확인 시간은 아직 버퍼(services/views.py)에만 있는 값까지 반영한다.
+
+
+# 사용자의 읽지 않은 댓글 조건 (Comment 기준)
+def _unread_filter(user_id):
+    last_viewed_at = last_viewed_expression(user_id)
+    return and_(
+        Image.user_id == user_id,
+        Comment.user_id != user_id,
+        or_(last_viewed_at.is_(None), Comment.created_at > last_viewed_at),
+    )
+
+
+def _view_join(user_id):
+    return and_(ImageView.image_id == Image.id, ImageView.user_id == user_id)
+
+
+# 읽지 않은 댓글 수 (스칼라 서브쿼리)
+def unread_count_subquery(user_id):
+    return select(func.count(Comment.id))\
+        .select_from(Comment)\
+        .join(Image, Image.id == Comment.image_id)\
+        .outerjoin(ImageView, _view_join(user_id))\
+        .where(_unread_filter(user_id))\
+        .scalar_subquery()
+
+
+# 최신 읽지 않은 댓글 목록 쿼리
+def latest_unread_query(user_id, limit=10):
+    return db.session.query(
+        Comment,
+        Image.title.label('image_title'),
+        User.nickname.label('commenter_nickname'),
+    ).select_from(Comment)\
+        .join(Image, Image.id == Comment.image_id)\
+        .join(User, User.id == Comment.user_id)\
+        .outerjoin(ImageView, _view_join(user_id))\
+        .filter(_unread_filter(user_id))\
+        .order_by(Comment.created_at.desc(), Comment.id.desc())\
+        .limit(limit)
+
+
+# 최신 읽지 않은 댓글 목록
+def latest_unread(user_id, limit=10):
+    return latest_unread_query(user_id, limit).all()
+
+
+# 내 이미지 페이지 쿼리 (이미지, 읽지 않은 댓글 수), 최신 순으로 limit + 1개
+# 페이지에 해당하는 이미지 id를 인덱스로 먼저 고르고, 그 이미지들에 대해서만
+# image_views/읽지 않은 댓글을 LEFT JOIN 해서 한 번의 GROUP BY로 센다.
+# 전체 댓글 수는 Image.comment_count 카운터를 쓴다.
+def my_images_page_query(user_id, cursor, limit):
+    page = feed_page_query(cursor, limit, db.session.query(Image.id).filter(Image.user_id == user_id)).subquery()
+
+    return db.session.query(Image, func.count(Comment.id).label('unread_comments'))\
+        .join(page, page.c.id == Image.id)\
+        .outerjoin(ImageView, _view_join(user_id))\
+        .outerjoin(Comment, and_(Comment.image_id == Image.id, _unread_filter(user_id)))\
+        .group_by(Image.id)\
+        .order_by(Image.created_at.desc(), Image.id.desc())
+
+
+# 내 이미지 페이지 조회 후 (행 목록, 다음 커서) 반환
+def my_images_page(user_id, cursor, limit):
+    rows = my_images_page_query(user_id, cursor, limit).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Image
+        next_cursor = encode_cursor(createdAt=last.created_at, id=last.id)
+
+    return rows, next_cursor
+
+
+# 내 이미지 한 개를 API 응답 형태로 변환
+def serialize_my_image(image, unread_comments):
+    return {
+        'id': image.id,
+        'title': image.title,
+        'description': image.description,
+        'imageUrl': f'{IMAGE_FILE_URL}{image.image_url}',
+        'createdAt': image.created_at.isoformat(),
+        'totalComments': image.comment_count,
+        'unreadComments': unread_comments
+    }
+
+
+# 읽지 않은 댓글 수 (캐시가 비어 있으면 한 번의 UPDATE로 계산해서 채운다)
+def unread_count(user_id):
+    # 아직 기록되지 않은 확인 시간이 있으면 캐시 대신 바로 계산 (기록될 때 캐시가 무효화된다)
+    if pending_views(user_id):
+        return db.session.query(unread_count_subquery(user_id)).scalar()
+
+    cached = db.session.query(User.unread_comment_count).filter_by(id=user_id).scalar()
+    if cached is not None:
+        return cached
+
+    User.query.filter(User.id == user_id, User.unread_comment_count.is_(None))\
+        .update({User.unread_comment_count: unread_count_subquery(user_id)}, synchronize_session=False)
+    db.session.commit()
+    return db.session.query(User.unread_comment_count).filter_by(id=user_id).scalar() or 0
+
+
+# 댓글 작성 시 (이미지 주인이 아닌 사람이 쓴 경우만 증가, 캐시가 비어 있으면 그대로 둔다)
+def comment_created(image_owner_id, commenter_id):
+    if image_owner_id == commenter_id:
+        return
+    User.query.filter(User.id == image_owner_id, User.unread_comment_count.isnot(None))\
+        .update({User.unread_comment_count: User.unread_comment_count + 1}, synchronize_session=False)
+
+
+# 캐시 무효화 (확인 처리, 댓글/이미지 삭제 등)
+def invalidate(user_id):
+    User.query.filter_by(id=user_id)\
+        .update({User.unread_comment_count: None}, synchronize_session=False)
+
+
+# 알림 한 개를 API 응답 형태로 변환
+def notification_payload(comment, image_title, commenter_nickname):
+    return {
+        'id': f"{comment.image_id}_{comment.id}",
+        'imageId': comment.image_id,
+        'imageTitle': image_title,
+        'commentId': comment.id,
+        'commenterNickname': commenter_nickname or '알 수 없음',
+        'commentPreview': comment.content[:30] + '...' if len(comment.content) > 30 else comment.content,
+        'createdAt': comment.created_at.isoformat()
+    }
+
+
+# 읽지 않은 개수가 바뀌었음을 스트림으로 알림
+def publish_unread_count(user_id):
+    events.publish(user_id, 'unread-count', {'count': unread_count(user_id)})
+
+
+# 새 댓글 알림을 이미지 주인에게 전송 (커밋 후 호출, payload는 notification_payload 결과)
+def publish_new_comment(image_owner_id, commenter_id, payload):
+    if image_owner_id == commenter_id:
+        return
+    events.publish(image_owner_id, 'comment', payload)
+    publish_unread_count(image_owner_id)
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+
+# 커서(키셋) 페이지네이션용 토큰 처리
+# 커서는 마지막 행의 정렬 키를 JSON으로 담아 base64url로 감싼 불투명 문자열이다.
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# 정렬 키 -> 커서 문자열
+def encode_cursor(**keys):
+    payload = {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in keys.items()
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+# 커서 문자열 -> 정렬 키 (datetime_keys에 해당하는 값은 datetime으로 복원)
+def decode_cursor(token, datetime_keys=()):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload, dict):
+            raise ValueError('cursor payload must be an object')
+        for name in datetime_keys:
+            payload[name] = datetime.fromisoformat(payload[name])
+        return payload
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(str(e))
+
+
+# "1,2,3" -> [1, 2, 3] (중복 제거, 순서 유지, 잘못된 값이면 None)
+def parse_id_list(value):
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        return None
+    return list(dict.fromkeys(ids))
@@ -0,0 +1,139 @@
+import math
+from models import Image
+from services.backfill import backfill_images
+
+# 피드 그리드가 이미지를 받기 전에 바로 그릴 수 있는 자리 표시 정보
+# 업로드 후 한 번만 계산해서 Image에 저장한다 (JPEG는 업로드 요청에서, 그 외는 analyze 작업, services/analysis.py).
+#   - width/height: EXIF 방향을 반영한 원본 크기 (레이아웃 비율)
+#   - blurhash: 흐린 미리보기 문자열 (https://blurha.sh, 28자 안팎)
+#   - dominant_color: 가장 많이 쓰인 색 (#rrggbb, blurhash를 그리기 전 배경색)
+# 원본을 작은 크기로 한 번 디코딩한 미리보기(load_preview)를 지각 해시 계산과 같이 쓴다.
+
+PREVIEW_SIZE = 64
+BLURHASH_SIZE = 32
+BLURHASH_COMPONENTS = (4, 3)  # 가로로 긴 이미지 기준 (가로, 세로), 세로로 길면 뒤집는다
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+# 원본 -> (방향을 반영한 PREVIEW_SIZE 이하 RGB 미리보기, 방향을 반영한 원본 (가로, 세로))
+# JPEG는 draft로 줄인 크기로 디코딩한다. 투명한 부분은 흰 배경 위에 합성한다. 움직이는 이미지는 첫 프레임.
+def load_preview(path):
+    from PIL import Image as PILImage, ImageOps
+
+    with PILImage.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in (5, 6, 7, 8):  # 90도 회전된 방향
+            width, height = height, width
+        image.draft('RGB', (PREVIEW_SIZE, PREVIEW_SIZE))
+        preview = ImageOps.exif_transpose(image)
+
+    if preview.mode in ('RGBA', 'LA', 'PA') or 'transparency' in preview.info:
+        preview = preview.convert('RGBA')
+        background = PILImage.new('RGB', preview.size, (255, 255, 255))
+        background.paste(preview, mask=preview.getchannel('A'))
+        preview = background
+    elif preview.mode != 'RGB':
+        preview = preview.convert('RGB')
+
+    preview.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE), PILImage.LANCZOS)
+    return preview, (width, height)
+
+
+def _srgb_to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _base83(value, length):
+    return ''.join(BASE83[value // 83 ** (length - i - 1) % 83] for i in range(length))
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+# RGB 이미지 -> BlurHash 문자열
+def blurhash(image, x_components, y_components):
+    from PIL import Image as PILImage
+
+    image = image.copy()
+    image.thumbnail((BLURHASH_SIZE, BLURHASH_SIZE), PILImage.LANCZOS)
+    width, height = image.size
+    linear = [tuple(_srgb_to_linear(channel) for channel in pixel) for pixel in image.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[x] * cos_y[y]
+                    pixel = linear[row + x]
+                    r += basis * pixel[0]
+                    g += basis * pixel[1]
+                    b += basis * pixel[2]
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (max(0, min(18, int(_sign_pow(value / max_value, 0.5) * 9 + 9.5))) for value in factor)
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+# RGB 이미지에서 가장 많이 쓰인 색 (#rrggbb, 5색으로 줄여서 센다)
+def dominant_color(image):
+    palette_image = image.quantize(colors=5)
+    palette = palette_image.getpalette()
+    _, index = max(palette_image.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+# 미리보기 + 원본 크기 -> Image에 저장할 값
+def placeholder_values(preview, size):
+    width, height = size
+    x_components, y_components = BLURHASH_COMPONENTS if width >= height else BLURHASH_COMPONENTS[::-1]
+    return {
+        'width': width,
+        'height': height,
+        'blurhash': blurhash(preview, x_components, y_components),
+        'dominant_color': dominant_color(preview),
+    }
+
+
+PLACEHOLDER_COLUMNS = ('width', 'height', 'blurhash', 'dominant_color')
+
+
+def set_placeholder(image, values):
+    for name in PLACEHOLDER_COLUMNS:
+        setattr(image, name, values[name])
+
+
+# 자리 표시 정보가 없는 기존 이미지 채운 후 채운 이미지 수 반환 (flask --app app backfill-placeholders)
+def backfill_placeholders(upload_folder, batch_size=200):
+    return backfill_images(upload_folder, Image.blurhash, lambda path: placeholder_values(*load_preview(path)),
+                           '자리 표시', batch_size)
@@ -0,0 +1,96 @@
+from datetime import datetime
+from models import db, Image, User, Reaction, ImageReactionCount
+from services.feed import feed_query, feed_page_query
+from services.notifications import latest_unread_query, unread_count_subquery, my_images_page_query
+from services.pagination import encode_cursor
+from services.comments import comment_page_query, first_comment_pages_query
+from services.reactions import reaction_user_page_query
+from services.similarity import similar_candidates_query, SIMILAR_MAX_DISTANCE
+
+# 주요 엔드포인트 쿼리의 실행 계획 점검 (flask --app app explain-queries)
+# 각 쿼리를 EXPLAIN 해서 인덱스 없이 테이블 전체를 읽거나 정렬용 임시 공간을 쓰면 문제로 보고한다.
+# MySQL은 데이터가 거의 없으면 인덱스를 건너뛰기도 하므로 실제 규모의 데이터가 있는 DB에서 돌린다.
+
+SAMPLE_ID = 1
+
+
+# 인덱스로 좁힌 결과를 정렬하는 것이 정상인 쿼리 (여러 이미지의 댓글을 시간순으로 합침)
+SORT_ALLOWED = {'unread notifications', 'first comments of images', 'my images'}
+
+
+# 점검할 쿼리 목록 {이름: Query}
+def hot_queries():
+    cursor = encode_cursor(createdAt=datetime(2024, 1, 1), id=SAMPLE_ID)
+    return {
+        'feed page': feed_page_query(None, 12),
+        'feed page after cursor': feed_page_query(cursor, 12),
+        'image detail': feed_query().filter(Image.id == SAMPLE_ID),
+        'my images': my_images_page_query(SAMPLE_ID, cursor, 20),
+        'comments of image': comment_page_query(SAMPLE_ID, None, 50),
+        'comments of image newest first': comment_page_query(
+            SAMPLE_ID, encode_cursor(createdAt=datetime(2024, 1, 1), id=SAMPLE_ID), 50, 'desc'),
+        'first comments of images': first_comment_pages_query([SAMPLE_ID, 2], 10),
+        'reactions of image': db.session.query(Reaction.emoji, Reaction.user_id, User.username)
+            .join(User, User.id == Reaction.user_id)
+            .filter(Reaction.image_id == SAMPLE_ID),
+        'reaction counts': ImageReactionCount.query.filter(ImageReactionCount.image_id.in_([SAMPLE_ID, 2])),
+        'reaction users of emoji': reaction_user_page_query(SAMPLE_ID, '👍', encode_cursor(id=SAMPLE_ID), 20),
+        'my reactions': db.session.query(Reaction.image_id, Reaction.emoji)
+            .filter(Reaction.user_id == SAMPLE_ID, Reaction.image_id.in_([SAMPLE_ID, 2])),
+        'unread notifications': latest_unread_query(SAMPLE_ID, 10),
+        'unread count': db.session.query(unread_count_subquery(SAMPLE_ID)),
+        'similar image candidates': similar_candidates_query(0x0123456789abcdef, SIMILAR_MAX_DISTANCE, SAMPLE_ID),
+    }
+
+
+def _compile(statement, dialect):
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return compiled.string, params
+
+
+# SQLite: EXPLAIN QUERY PLAN의 detail 문자열로 판단
+# 서브쿼리 결과(파생 테이블)를 읽는 SCAN은 이미 인덱스로 좁힌 결과라 문제로 보지 않는다
+def _sqlite_problems(connection, sql, params, allow_sort):
+    plan = [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params)]
+    problems = []
+    for detail in plan:
+        derived = detail.startswith(('SCAN (subquery', 'SCAN anon_')) or detail == 'SCAN CONSTANT ROW'
+        if detail.startswith('SCAN ') and 'USING' not in detail and not derived:
+            problems.append(detail)
+        elif 'USE TEMP B-TREE' in detail and not allow_sort:
+            problems.append(detail)
+    return plan, problems
+
+
+# MySQL: type=ALL(전체 스캔), Using filesort 를 문제로 본다
+def _mysql_problems(connection, sql, params, allow_sort):
+    result = connection.exec_driver_sql('EXPLAIN ' + sql, params)
+    columns = list(result.keys())
+    plan, problems = [], []
+    for row in result:
+        row = dict(zip(columns, row))
+        if row.get('table') is None or (row.get('table') or '').startswith('<'):
+            continue  # 파생 테이블/상수 결과
+        detail = f"{row['table']}: type={row.get('type')} key={row.get('key')} extra={row.get('Extra')}"
+        plan.append(detail)
+        if row.get('type') == 'ALL' or ('filesort' in (row.get('Extra') or '') and not allow_sort):
+            problems.append(detail)
+    return plan, problems
+
+
+# 모든 쿼리 점검 결과 [(이름, 계획 목록, 문제 목록)]
+def explain_hot_queries():
+    engine = db.engine
+    inspect = _mysql_problems if engine.dialect.name == 'mysql' else _sqlite_problems
+    results = []
+
+    with engine.connect() as connection:
+        for name, query in hot_queries().items():
+            sql, params = _compile(query.statement, engine.dialect)
+            plan, problems = inspect(connection, sql, params, name in SORT_ALLOWED)
+            results.append((name, plan, problems))
+
+    return results
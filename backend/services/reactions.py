@@ -0,0 +1,55 @@
+from models import db, Reaction, User, ImageReactionCount
+from services.pagination import decode_cursor, encode_cursor, InvalidCursor
+
+# 반응 요약/사용자 목록
+# 이모티콘별 개수는 카운터 테이블(image_reaction_counts)에서 읽고, 사용자 목록은 필요할 때만
+# 이모티콘 하나씩 페이지로 나눠 조회한다. 요약은 이미지 여러 개를 한 번에 처리한다.
+
+
+# 이미지별 요약 {image_id: {'counts': {"👍": 4}, 'myReactions': ["👍"]}}
+# 이미지 수와 관계없이 쿼리 2번 (로그인하지 않았으면 1번)
+def reaction_summaries(image_ids, user_id=None):
+    summaries = {image_id: {'counts': {}, 'myReactions': []} for image_id in image_ids}
+    if not summaries:
+        return summaries
+
+    counts = db.session.query(ImageReactionCount.image_id, ImageReactionCount.emoji, ImageReactionCount.count)\
+        .filter(ImageReactionCount.image_id.in_(summaries)).all()
+    for image_id, emoji, count in counts:
+        summaries[image_id]['counts'][emoji] = count
+
+    if user_id is not None:
+        mine = db.session.query(Reaction.image_id, Reaction.emoji)\
+            .filter(Reaction.user_id == user_id, Reaction.image_id.in_(summaries)).all()
+        for image_id, emoji in mine:
+            summaries[image_id]['myReactions'].append(emoji)
+
+    return summaries
+
+
+# 이모티콘 하나에 반응한 사용자 페이지 쿼리 (반응한 순서, limit + 1개)
+def reaction_user_page_query(image_id, emoji, cursor, limit):
+    query = db.session.query(Reaction.id, Reaction.user_id, User.username)\
+        .join(User, User.id == Reaction.user_id)\
+        .filter(Reaction.image_id == image_id, Reaction.emoji == emoji)
+
+    if cursor:
+        last_id = decode_cursor(cursor).get('id')
+        if not isinstance(last_id, int):
+            raise InvalidCursor('cursor id must be an integer')
+        query = query.filter(Reaction.id > last_id)
+
+    return query.order_by(Reaction.id.asc()).limit(limit + 1)
+
+
+# (사용자 목록, 다음 커서)
+def reaction_user_page(image_id, emoji, cursor, limit):
+    rows = reaction_user_page_query(image_id, emoji, cursor, limit).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(id=rows[-1].id)
+
+    users = [{'userId': user_id, 'username': username} for _, user_id, username in rows]
+    return users, next_cursor
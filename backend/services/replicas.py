@@ -0,0 +1,91 @@
+import random
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, request, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_sqlalchemy.session import Session
+
+# 읽기 전용 복제본(replica) 라우팅
+# @read_replica를 붙인 GET 엔드포인트의 SELECT는 SQLALCHEMY_BINDS의 replica_* 엔진 중 하나로 보내고,
+# 그 외 모든 쿼리와 쓰기(flush, INSERT/UPDATE/DELETE)는 기본(primary) 엔진으로 보낸다.
+# 같은 요청 안에서 한 번이라도 쓰기를 하면 그 뒤 읽기도 primary를 쓴다.
+# 사용자가 쓰기 요청을 하면 REPLICA_STICKY_SECONDS 동안 그 사용자의 읽기는 primary로 보낸다
+# (복제 지연 때문에 방금 쓴 내용이 안 보이는 것을 막기 위함, 프로세스 단위로 기억한다).
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                g.db_primary = True
+            elif g.get('use_replica') and not g.get('db_primary'):
+                engine = _replica_engine(self._db)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# 요청마다 복제본 하나를 골라 끝까지 같은 것을 쓴다
+def _replica_engine(db):
+    if 'replica_key' not in g:
+        keys = [key for key in db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+        g.replica_key = random.choice(keys) if keys else None
+    return db.engines[g.replica_key] if g.replica_key else None
+
+
+class _StickyWriters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._until = {}
+
+    def mark(self, user_id, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + seconds
+            if len(self._until) > 10000:
+                self._until = {uid: until for uid, until in self._until.items() if until > now}
+
+    def is_sticky(self, user_id):
+        with self._lock:
+            return self._until.get(user_id, 0) > time.monotonic()
+
+
+_sticky_writers = _StickyWriters()
+
+
+def _request_user_id():
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        return None  # 잘못된 토큰은 여기서 막지 않는다 (인증은 각 엔드포인트가 처리)
+    return int(identity) if identity else None
+
+
+# 이 요청의 사용자가 최근에 쓰기를 해서 primary에서 읽어야 하는지 (요청마다 한 번만 판단)
+def is_sticky_writer():
+    if 'sticky_writer' not in g:
+        user_id = _request_user_id()
+        g.sticky_writer = user_id is not None and _sticky_writers.is_sticky(user_id)
+    return g.sticky_writer
+
+
+# 조회 엔드포인트를 복제본으로 보낸다 (최근에 쓰기를 한 사용자는 primary)
+def read_replica(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = not is_sticky_writer()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# 성공한 쓰기 요청 뒤에 사용자를 잠시 primary에 고정 (app.after_request로 등록)
+def remember_writer(response):
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        user_id = _request_user_id()
+        if user_id is not None:
+            _sticky_writers.mark(user_id, current_app.config.get('REPLICA_STICKY_SECONDS', 5))
+    return response
@@ -0,0 +1,185 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import or_, and_, func
+from sqlalchemy.dialects.mysql import match
+from models import db, Image
+from services.feed import feed_query
+from services.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+# 이미지 제목/설명 전문 검색
+# MySQL에서는 ngram 파서를 쓰는 FULLTEXT 인덱스(models.py)를 MATCH ... AGAINST로 조회하고,
+# 그 외 DB(SQLite 테스트 등)에서는 프로세스 메모리의 역색인으로 같은 결과 형태를 만든다.
+
+NGRAM_SIZE = 2          # MySQL ngram_token_size 기본값과 맞춤
+TITLE_WEIGHT = 2.0      # 제목에 나온 단어는 설명보다 가중치를 높게
+SCORE_DIGITS = 6        # 점수는 소수점 6자리로 반올림해서 정렬/커서 비교에 쓴다 (커서 JSON을 오가도 같은 값)
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+# 텍스트 -> ngram 토큰 목록 (한국어처럼 띄어쓰기가 불규칙한 텍스트도 부분 일치되도록)
+def tokenize(text):
+    tokens = []
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        if len(word) <= NGRAM_SIZE:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + NGRAM_SIZE] for i in range(len(word) - NGRAM_SIZE + 1))
+    return tokens
+
+
+# 순수 파이썬 역색인 (FULLTEXT를 쓸 수 없는 DB용)
+class InvertedIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)   # token -> {image_id: weight}
+        self._documents = {}                 # image_id -> set(tokens)
+        self._loaded = False
+
+    # 처음 검색할 때 DB의 기존 이미지로 색인을 채운다
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        rows = db.session.query(Image.id, Image.title, Image.description).all()
+        with self._lock:
+            if self._loaded:
+                return
+            for image_id, title, description in rows:
+                self._add(image_id, title, description)
+            self._loaded = True
+
+    def _add(self, image_id, title, description):
+        self._remove(image_id)
+        weights = defaultdict(float)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] += 1.0
+        for token, weight in weights.items():
+            self._postings[token][image_id] = weight
+        self._documents[image_id] = set(weights)
+
+    def _remove(self, image_id):
+        for token in self._documents.pop(image_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(image_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def index_image(self, image):
+        if not self._loaded:
+            return  # 아직 로드 전이면 첫 검색 때 DB에서 함께 읽힌다
+        with self._lock:
+            self._add(image.id, image.title, image.description)
+
+    def remove_image(self, image_id):
+        with self._lock:
+            self._remove(image_id)
+
+    # 질의 -> [(score, image_id)] (TF-IDF 합, 점수 내림차순)
+    def search(self, query):
+        self._ensure_loaded()
+        scores = defaultdict(float)
+        with self._lock:
+            total = max(len(self._documents), 1)
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for image_id, weight in postings.items():
+                    scores[image_id] += weight * idf
+        return sorted(((round(score, SCORE_DIGITS), image_id) for image_id, score in scores.items()), reverse=True)
+
+
+# FULLTEXT 인덱스는 DB가 직접 갱신하므로 색인 작업이 필요 없다
+class FullTextIndex:
+    def index_image(self, image):
+        pass
+
+    def remove_image(self, image_id):
+        pass
+
+
+# 현재 앱의 DB에 맞는 색인 객체
+def get_search_index():
+    if db.engine.dialect.name == 'mysql':
+        return FullTextIndex()
+    if 'image_search' not in current_app.extensions:
+        current_app.extensions['image_search'] = InvertedIndex()
+    return current_app.extensions['image_search']
+
+
+# 업로드/수정 후 색인 갱신
+def index_image(image):
+    get_search_index().index_image(image)
+
+
+# 삭제 후 색인에서 제거
+def remove_image(image_id):
+    get_search_index().remove_image(image_id)
+
+
+def _decode_search_cursor(cursor):
+    keys = decode_cursor(cursor)
+    score, last_id = keys.get('score'), keys.get('id')
+    if not isinstance(score, (int, float)) or not isinstance(last_id, int):
+        raise InvalidCursor('cursor must contain score and id')
+    return round(float(score), SCORE_DIGITS), last_id
+
+
+# MySQL 검색 쿼리: 관련도(반올림한 MATCH 점수), id 내림차순으로 커서 다음 limit + 1개
+# 조건은 반올림 전 MATCH로 걸어야 FULLTEXT 인덱스를 쓴다.
+def mysql_search_query(query, cursor, limit):
+    relevance = match(Image.title, Image.description, against=query).in_natural_language_mode()
+    score = func.round(relevance, SCORE_DIGITS)
+    rows_query = feed_query().add_columns(score.label('score')).filter(relevance > 0)
+
+    if cursor:
+        last_score, last_id = _decode_search_cursor(cursor)
+        rows_query = rows_query.filter(or_(
+            score < last_score,
+            and_(score == last_score, Image.id < last_id),
+        ))
+
+    return rows_query.order_by(score.desc(), Image.id.desc()).limit(limit + 1)
+
+
+def _search_mysql(query, cursor, limit):
+    return [(row.score, row) for row in mysql_search_query(query, cursor, limit).all()]
+
+
+def _search_memory(index, query, cursor, limit):
+    hits = index.search(query)
+
+    if cursor:
+        last_score, last_id = _decode_search_cursor(cursor)
+        hits = [(s, i) for s, i in hits if s < last_score or (s == last_score and i < last_id)]
+
+    hits = hits[:limit + 1]
+    if not hits:
+        return []
+
+    rows = feed_query().filter(Image.id.in_([image_id for _, image_id in hits])).all()
+    rows_by_id = {row.Image.id: row for row in rows}
+    return [(score, rows_by_id[image_id]) for score, image_id in hits if image_id in rows_by_id]
+
+
+# 검색 결과 한 페이지와 다음 커서 반환 (관련도 내림차순, 같은 점수는 최신 id 우선)
+def search_page(query, cursor, limit):
+    if db.engine.dialect.name == 'mysql':
+        scored = _search_mysql(query, cursor, limit)
+    else:
+        scored = _search_memory(get_search_index(), query, cursor, limit)
+
+    next_cursor = None
+    if len(scored) > limit:
+        scored = scored[:limit]
+        last_score, last_row = scored[-1]
+        next_cursor = encode_cursor(score=float(last_score), id=last_row.Image.id)
+
+    return [row for _, row in scored], next_cursor
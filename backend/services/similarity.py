@@ -0,0 +1,137 @@
+import sqlite3
+from itertools import combinations
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.engine import Engine
+from models import db, Image
+from services.backfill import backfill_images
+from services.placeholders import load_preview
+
+# 지각 해시(dHash)로 비슷한 이미지 찾기 (같은 사진을 다른 파일로 다시 올린 경우 등)
+# 64비트 해시를 images.phash(BIGINT)에 저장하고, 16비트씩 나눈 4조각을 각각 인덱스가 있는
+# phash_0 ~ phash_3 컬럼에 둔다 (multi-index hashing).
+# 해밍 거리가 d 이하인 두 해시는 4조각 중 적어도 하나가 d // 4 비트 이하로만 다르므로,
+# 각 조각 컬럼에서 그 범위의 값만 인덱스로 찾은 후보 중 실제 거리가 d 이하인 것만 SQL에서 거른다
+# (테이블 전체를 훑지 않음). 거리 계산은 MySQL은 BIT_COUNT, PostgreSQL은 bit(64)의 bit_count,
+# SQLite는 연결할 때 등록하는 phash_distance 함수로 한다.
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+HASH_COLUMNS = ('phash', 'phash_0', 'phash_1', 'phash_2', 'phash_3')
+
+DUPLICATE_MAX_DISTANCE = 3  # 업로드 시 중복 경고 (조각 하나가 정확히 같아야 하므로 조회가 가장 싸다)
+SIMILAR_MAX_DISTANCE = 7  # 비슷한 이미지 조회 기본값/상한 (조각당 1비트 차이까지 탐색)
+MAX_CANDIDATES = 1000  # 거리로 거른 뒤 가져오는 후보 수 상한
+
+
+# 미리보기 이미지의 dHash (부호 없는 64비트 정수)
+# 9x8 흑백으로 줄여 가로로 이웃한 픽셀의 밝기 비교 결과를 비트로 모은다.
+def dhash_image(preview):
+    from PIL import Image as PILImage
+
+    pixels = list(preview.convert('L').resize((9, 8), PILImage.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+# 이미지 파일의 dHash (작게 디코딩한 미리보기로 계산, services/placeholders.py)
+def dhash(path):
+    preview, _ = load_preview(path)
+    return dhash_image(preview)
+
+
+# 부호 없는 64비트 값 <-> BIGINT(부호 있음)에 저장하는 값
+def to_signed(value):
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def hash_chunks(value):
+    return [(value >> (CHUNK_BITS * i)) & CHUNK_MASK for i in range(CHUNKS)]
+
+
+# 해시 -> {컬럼 이름: 값} (phash와 조각 컬럼, None이면 모두 비운다)
+def hash_values(value):
+    chunks = hash_chunks(value) if value is not None else [None] * CHUNKS
+    values = {'phash': to_signed(value) if value is not None else None}
+    values.update({f'phash_{i}': chunk for i, chunk in enumerate(chunks)})
+    return values
+
+
+# 이미지에 해시와 조각 컬럼 설정
+def set_image_hash(image, value):
+    for name, column_value in hash_values(value).items():
+        setattr(image, name, column_value)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+# 조각 값과 radius 비트 이하로 다른 모든 값
+def _chunk_neighbors(chunk, radius):
+    values = [chunk]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), flips):
+            flipped = chunk
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+# SQLite 연결마다 해밍 거리 함수 등록 (SQLite에는 XOR/비트 수 세기 연산이 없다)
+@event.listens_for(Engine, 'connect')
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(
+            'phash_distance', 2, lambda a, b: hamming_distance(to_unsigned(a), to_unsigned(b)), deterministic=True)
+
+
+# images.phash와 value(부호 없는 64비트)의 해밍 거리 SQL 식
+def _distance_expression(value):
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        return db.func.bit_count(Image.phash.op('^')(to_signed(value)))
+    if dialect == 'postgresql':
+        return db.func.bit_count(db.cast(Image.phash.op('#')(to_signed(value)), BIT(HASH_BITS)))
+    return db.func.phash_distance(Image.phash, to_signed(value))
+
+
+# 해밍 거리 max_distance 이하인 (id, phash) 조회 쿼리 (MAX_CANDIDATES개까지)
+# 조각 조건 4개를 모두 OR로 걸어야 거리 d 이하인 해시를 빠짐없이 찾는다.
+# 거리 조건을 LIMIT보다 먼저 적용하므로 조각만 우연히 같은 먼 해시가 상한을 채우지 않는다.
+# 정렬은 하지 않는다 (정렬하면 조각 인덱스 대신 PK 순서로 훑거나 임시 정렬을 쓰게 된다).
+def similar_candidates_query(value, max_distance, exclude_id=None):
+    radius = max_distance // CHUNKS
+    columns = (Image.phash_0, Image.phash_1, Image.phash_2, Image.phash_3)
+    query = db.session.query(Image.id, Image.phash).filter(db.or_(*[
+        column.in_(_chunk_neighbors(chunk, radius))
+        for column, chunk in zip(columns, hash_chunks(value))
+    ]), _distance_expression(value) <= max_distance)
+    if exclude_id is not None:
+        query = query.filter(Image.id != exclude_id)
+    return query.limit(MAX_CANDIDATES)
+
+
+# 해시가 비슷한 이미지 [(image_id, 거리)] (거리, 최신순)
+def similar_images(value, max_distance, limit, exclude_id=None):
+    matches = []
+    for image_id, phash in similar_candidates_query(value, max_distance, exclude_id):
+        matches.append((hamming_distance(value, to_unsigned(phash)), -image_id))
+    matches.sort()
+    return [(-negative_id, distance) for distance, negative_id in matches[:limit]]
+
+
+# 해시가 없는 기존 이미지의 해시 계산 후 채운 이미지 수 반환 (flask --app app backfill-phash)
+def backfill_hashes(upload_folder, batch_size=200):
+    return backfill_images(upload_folder, Image.phash, lambda path: hash_values(dhash(path)), '해시', batch_size)
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import tempfile
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import db, StoredFile
+from services.derivatives import remove_derivatives
+from services.transcode import remove_variants
+
+# 내용 해시 기반 업로드 저장소
+# 파일은 sha256으로 이름 짓고 uploads/ab/cd/<sha256>.<ext> 처럼 두 단계로 나눠 저장한다.
+# 같은 내용은 한 번만 저장하고 stored_files.ref_count로 참조하는 이미지 수를 센다.
+# 예전 방식({timestamp}_{filename})으로 저장된 파일은 stored_files 행이 없으며 그대로 동작한다.
+# 파일 삭제는 참조 해제가 커밋된 뒤에만 하고, 그 시점에 stored_files 행이 다시 생겼으면
+# (같은 내용이 동시에 다시 올라온 경우) 지우지 않는다.
+
+CHUNK_SIZE = 64 * 1024
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+def upload_folder():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+# 해시 + 확장자 -> 저장 키 (uploads 기준 상대 경로)
+def storage_key(content_hash, ext):
+    ext = EXTENSION_ALIASES.get(ext.lower(), ext.lower())
+    return f'{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.{ext}'
+
+
+# 업로드 스트림을 청크 단위로 임시 파일에 쓰면서 해시 계산
+def spool_to_temp(stream, folder):
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+
+# 참조 수 1 증가 (행이 없으면 생성)
+def _add_reference(key, content_hash, size):
+    updated = StoredFile.query.filter_by(key=key)\
+        .update({'ref_count': StoredFile.ref_count + 1}, synchronize_session=False)
+    if updated:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(StoredFile(key=key, content_hash=content_hash, size=size, ref_count=1))
+    except IntegrityError:
+        # 동시에 같은 파일이 올라와 다른 요청이 먼저 행을 만든 경우
+        StoredFile.query.filter_by(key=key)\
+            .update({'ref_count': StoredFile.ref_count + 1}, synchronize_session=False)
+
+
+# 해시까지 계산된 임시 파일을 저장소로 옮기고 저장 키 반환 (이미 같은 내용이 있으면 기존 파일을 참조)
+# 임시 파일은 업로드 폴더 안에 있어야 rename이 원자적으로 된다.
+# 참조를 먼저 잡은 뒤에 파일을 확인한다. 참조 행이 잠겨 있는 동안에는 다른 요청의 커밋 후 삭제가
+# 기다리므로, 여기서 "파일이 있다"고 보고 임시 파일을 버려도 그 파일이 지워지지 않는다.
+# 참조 수 변경은 호출한 쪽의 트랜잭션과 함께 커밋된다.
+def store_file(temp_path, content_hash, size, ext):
+    folder = upload_folder()
+    key = storage_key(content_hash, ext)
+    path = os.path.join(folder, key)
+
+    _add_reference(key, content_hash, size)
+
+    if os.path.exists(path):
+        os.remove(temp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+    return key
+
+
+# 이미지가 더 이상 파일을 쓰지 않을 때 참조 해제
+# 마지막 참조면 원본, 썸네일, 변환본을 커밋 후에 삭제하도록 예약한다 (커밋이 실패하면 그대로 남는다).
+def release(key):
+    stored = StoredFile.query.filter_by(key=key).with_for_update().populate_existing().first()
+
+    if stored is not None:
+        stored.ref_count -= 1
+        if stored.ref_count > 0:
+            return
+        db.session.delete(stored)
+
+    db.session.info.setdefault('released_files', set()).add((upload_folder(), key))
+
+
+def _remove_files(folder, key):
+    path = os.path.join(folder, key)
+    if os.path.exists(path):
+        os.remove(path)
+    remove_derivatives(folder, key)
+    remove_variants(folder, key)
+
+
+# 커밋 후: 예약된 파일 중 그 사이 다시 참조되지 않은 것만 삭제
+# 키를 잠그고 확인하므로, 같은 내용을 막 참조한 업로드가 커밋할 때까지 기다렸다가 판단한다.
+@event.listens_for(Session, 'after_commit')
+def _remove_released_files(session):
+    released = session.info.pop('released_files', None)
+    if not released:
+        return
+
+    try:
+        with db.engine.begin() as connection:
+            for folder, key in released:
+                referenced = connection.execute(
+                    select(StoredFile.id).where(StoredFile.key == key).with_for_update()
+                ).first()
+                if referenced is None:
+                    _remove_files(folder, key)
+    except Exception as e:
+        # 파일이 남을 뿐 데이터는 맞으므로 요청은 실패시키지 않는다
+        print(f"에러: 참조 해제된 파일 삭제 실패: {str(e)}")
+
+
+# 롤백된 트랜잭션의 예약은 버린다 (커밋이면 위에서 이미 처리, 세이브포인트 롤백은 해당 없음)
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_released_files(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('released_files', None)
+
+
+# 작업 결과를 버릴 때: 아무도 참조하지 않는 파일의 썸네일만 지운다
+def discard_derivatives(folder, key):
+    if StoredFile.query.filter_by(key=key).first() is None:
+        remove_derivatives(folder, key)
+
+
+# 변환 작업 결과를 버릴 때: 아무도 참조하지 않는 파일의 변환본만 지운다
+def discard_variants(folder, key):
+    if StoredFile.query.filter_by(key=key).first() is None:
+        remove_variants(folder, key)
@@ -0,0 +1,179 @@
+import os
+import tempfile
+
+# 원본을 전송용 최신 형식(AVIF, WebP)으로 다시 인코딩한 변환본 생성
+# EXIF 방향은 픽셀에 적용하고, EXIF/XMP 메타데이터(촬영 위치, 기기 정보, 내장 썸네일)는 버린다.
+# 색이 달라지지 않도록 ICC 색 프로필만 유지한다.
+# 변환본은 원본과 같은 폴더에 {원본 이름}_full.{형식} 으로 저장하고, 원본보다 작은 것만 남긴다.
+# serve_image는 Accept 헤더를 보고 원본 대신 변환본을 보낸다 (services/delivery.py).
+# 움직이는 이미지(GIF 등)는 움직이는 WebP 하나만 만든다 (프레임을 하나씩 읽어 인코딩, 전체를 메모리에 올리지 않음).
+# 피드 그리드의 정지 포스터는 썸네일 작업이 만든 첫 프레임 WebP를 쓴다 (services/feed.py).
+# 원본은 내용 해시로 이름 지은 공유 파일이라 다시 쓰지 않고, 메타데이터만 뺀 같은 형식의 사본을
+# {원본 이름}_clean.{확장자} 로 만든다. 변환본을 받지 않는 클라이언트에는 원본 대신 이 사본을 보낸다.
+
+TRANSCODE_FORMATS = ('avif', 'webp')  # 선호 순서
+TRANSCODE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 82, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 60, 'speed': 6},
+}
+TRANSCODE_MIMETYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+ANIMATED_OPTIONS = {'format': 'WEBP', 'quality': 75, 'method': 4, 'save_all': True}
+MAX_ANIMATED_FRAMES = 300  # 업로드 검증 이전에 올라온 파일도 이보다 많으면 변환하지 않는다
+MIN_FRAME_DURATION = 20  # 이보다 짧은 GIF 프레임은 브라우저처럼 100ms로 재생
+CLEAN_OPTIONS = {
+    'JPEG': {'quality': 90},
+    'WEBP': {'quality': 90, 'method': 4},
+    'PNG': {},
+    'GIF': {},
+}
+# 여러 장이 들어 있지만 첫 장만 쓰는 형식 -> 사본 저장 형식 (휴대폰 JPEG의 MPO)
+STILL_FORMATS = {'MPO': 'JPEG'}
+# 저장할 때 원본 info에서 따라오는 메타데이터(JPEG/GIF 주석 등)를 빈 값으로 덮는다
+NO_METADATA = {'exif': b'', 'xmp': b'', 'comment': b''}
+
+
+# 원본 파일명 + 형식 -> 변환본 파일명
+def variant_filename(image_url, fmt):
+    stem = image_url.rsplit('.', 1)[0]
+    return f'{stem}_full.{fmt}'
+
+
+# 원본 파일명 -> 메타데이터를 뺀 사본 파일명 (확장자는 원본과 같다)
+def clean_filename(image_url):
+    stem, ext = image_url.rsplit('.', 1)
+    return f'{stem}_clean.{ext}'
+
+
+# 이 Pillow 빌드로 만들 수 있는 형식 (AVIF는 코덱이 있을 때만)
+def available_formats():
+    from PIL import features
+    return [fmt for fmt in TRANSCODE_FORMATS if features.check(fmt)]
+
+
+# 변환본 생성 후 크기 반환 {'original': 원본 크기, 'clean': 사본 크기, 'webp': 크기, ...}
+# 원본보다 크거나 같은 변환본은 지운다. 메타데이터를 뺀 사본은 크기와 상관없이 남긴다.
+# 작업 워커 프로세스에서 실행된다.
+def transcode_image(upload_folder, image_url):
+    from PIL import Image as PILImage, ImageOps
+
+    source_path = os.path.join(upload_folder, image_url)
+    sizes = {'original': os.path.getsize(source_path)}
+    clean_path = os.path.join(upload_folder, clean_filename(image_url))
+
+    with PILImage.open(source_path) as source:
+        image_format = STILL_FORMATS.get(source.format, source.format)
+        clean_options = dict(CLEAN_OPTIONS[image_format], format=image_format, **NO_METADATA)
+        icc_profile = source.info.get('icc_profile')
+
+        if getattr(source, 'is_animated', False) and source.format not in STILL_FORMATS:
+            if source.n_frames > MAX_ANIMATED_FRAMES:
+                return sizes
+            animated_options = _animated_options(source)
+            # 사본은 원본과 같은 형식이므로 반복 정보도 원본에 있을 때만 그대로 쓴다
+            # (GIF는 반복 정보가 없어야 한 번만 재생되고, loop=1이면 두 번 재생된다)
+            animation = dict(clean_options, save_all=True, duration=animated_options['duration'])
+            if 'loop' in source.info:
+                animation['loop'] = source.info['loop']
+            sizes['clean'] = _save_variant(source, clean_path, icc_profile, animation)
+            source.seek(0)
+            if 'webp' in available_formats():
+                _add_if_smaller(sizes, upload_folder, image_url, 'webp',
+                                lambda path: _save_variant(source, path, None, animated_options))
+            return sizes
+
+        # 방향은 픽셀에 적용한다 (EXIF를 버리므로)
+        image = ImageOps.exif_transpose(source)
+        sizes['clean'] = _save_variant(image, clean_path, icc_profile, clean_options)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA', 'RGBa') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        # 저장할 때 원본의 메타데이터가 따라가지 않도록 비운다
+        image.info = {}
+
+        for fmt in available_formats():
+            _add_if_smaller(sizes, upload_folder, image_url, fmt,
+                            lambda path: _save_variant(image, path, icc_profile, TRANSCODE_OPTIONS[fmt]))
+
+    return sizes
+
+
+# 변환본을 만들어 원본보다 작으면 크기를 기록하고, 아니면 지운다
+def _add_if_smaller(sizes, upload_folder, image_url, fmt, save):
+    path = os.path.join(upload_folder, variant_filename(image_url, fmt))
+    size = save(path)
+    if size < sizes['original']:
+        sizes[fmt] = size
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+# 움직이는 WebP 저장 옵션 (프레임별 재생 시간, 반복 횟수는 원본을 따른다)
+def _animated_options(source):
+    from PIL import ImageSequence
+
+    durations = []
+    for frame in ImageSequence.Iterator(source):
+        duration = frame.info.get('duration') or 0
+        durations.append(duration if duration >= MIN_FRAME_DURATION else 100)
+    source.seek(0)
+
+    options = dict(ANIMATED_OPTIONS, duration=durations)
+    # GIF에 반복 정보가 없으면 WebP 변환본도 한 번만 재생한다 (WebP의 loop=0은 무한 반복, 1은 한 번)
+    options['loop'] = source.info.get('loop', 1 if source.format == 'GIF' else 0)
+    return options
+
+
+# 임시 파일에 저장 후 rename (serve_image가 반쯤 쓴 파일을 보내지 않도록)
+def _save_variant(image, path, icc_profile, options):
+    options = dict(options)
+    image_format = options.pop('format')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.transcode-')
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            image.save(temp, image_format, **options)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
+
+
+# 변환본과 메타데이터를 뺀 사본 삭제
+def remove_variants(upload_folder, image_url):
+    filenames = [variant_filename(image_url, fmt) for fmt in TRANSCODE_FORMATS] + [clean_filename(image_url)]
+    for filename in filenames:
+        path = os.path.join(upload_folder, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# 저장된 크기 문자열("original:2400000,webp:310000") -> {'original': 2400000, 'webp': 310000}
+def parse_sizes(value):
+    if not value:
+        return {}
+    return {name: int(size) for name, size in (item.split(':') for item in value.split(',') if item)}
+
+
+# {'original': 2400000, 'webp': 310000} -> "original:2400000,webp:310000"
+def format_sizes(sizes):
+    return ','.join(f'{name}:{size}' for name, size in sizes.items()) or None
+
+
+# 이미지 한 장의 변환 절감량 (가장 작은 변환본 기준, 변환 전이면 None)
+def savings_report(sizes):
+    if 'original' not in sizes:
+        return None
+    original = sizes['original']
+    variants = {fmt: sizes[fmt] for fmt in TRANSCODE_FORMATS if fmt in sizes}
+    best = min(variants.values()) if variants else original
+    return {
+        'originalBytes': original,
+        'variants': variants,
+        'savedBytes': original - best,
+        'savedPercent': round((original - best) * 100 / original, 1) if original else 0.0,
+    }
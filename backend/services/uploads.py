@@ -0,0 +1,229 @@
+import hashlib
+import os
+import tempfile
+from flask import Request, current_app
+from werkzeug.formparser import FormDataParser, MultiPartParser
+from werkzeug.http import parse_options_header
+from services import storage
+from services.analysis import analyze_preview, QUICK_FORMATS
+from services.placeholders import load_preview
+
+# 이미지 업로드 수신/검증
+# multipart 본문의 파일 부분을 werkzeug가 메모리/임시 파일에 한 번 받아 두고 다시 복사하는 대신,
+# UploadRequest가 업로드 폴더 안의 임시 파일(UploadSpool)로 바로 흘려 쓴다. 쓰는 동안
+#   - sha256 해시와 크기를 계산하고
+#   - 앞부분 바이트(매직 넘버)로 형식을 확인해서 이미지가 아니면 본문을 끝까지 받지 않고 중단한다.
+# 수신이 끝나면 헤더만 읽어 가로/세로 크기를 확인하고(압축 폭탄 차단), 통과한 파일만
+# 내용 해시 경로로 rename 한다. 검증에 실패하거나 저장하지 않은 임시 파일은 요청이 끝날 때 지운다.
+# 움직이는 이미지(GIF, WebP, APNG)는 프레임 수와 전체 프레임 픽셀 합도 제한한다
+# (프레임 수는 프레임 헤더만 훑어서 센다, 픽셀 디코딩 없음).
+# 엔드포인트가 꼭 받아야 하는 텍스트 필드(예: 제목)는 파일 부분보다 먼저 와야 하고,
+# 파일 부분이 시작될 때 아직 오지 않았으면 파일을 받기 전에 중단한다.
+
+SNIFF_BYTES = 12
+
+# 매직 넘버 -> 형식 (저장 확장자)
+def sniff_format(head):
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+# Pillow가 알려주는 형식 -> 저장 확장자
+# 휴대폰 JPEG는 MPF(여러 장 묶음) 정보가 있으면 MPO로 열린다. 표시하는 것은 첫 장뿐이므로 JPEG 한 장으로 본다.
+PIL_FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'MPO': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+SINGLE_FRAME_FORMATS = ('JPEG', 'MPO')
+
+
+class UploadRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class UploadSpool:
+    def __init__(self, folder):
+        fd, self.path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+
+    def write(self, data):
+        if len(self.head) < SNIFF_BYTES:
+            self.head += data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES and sniff_format(self.head) is None:
+                raise UploadRejected('허용되지 않는 파일 형식입니다.')
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    @property
+    def content_hash(self):
+        return self._digest.hexdigest()
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        return self._file.readline(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    # 저장소로 옮기지 않은 임시 파일 삭제 (옮겼으면 이미 없다)
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# 텍스트 필드를 다 받을 때마다 on_field(이름)를 부르는 multipart 파서
+# (werkzeug는 필드 값을 디코딩하기 직전에 그 필드의 헤더로 get_part_charset을 부른다)
+class _FieldTrackingMultiPartParser(MultiPartParser):
+    def __init__(self, on_field, **kwargs):
+        super().__init__(**kwargs)
+        self.on_field = on_field
+
+    def get_part_charset(self, headers):
+        self.on_field(parse_options_header(headers.get('content-disposition', ''))[1].get('name'))
+        return super().get_part_charset(headers)
+
+
+# werkzeug FormDataParser와 같고 multipart 파서만 위의 것으로 바꾼다
+class _UploadFormDataParser(FormDataParser):
+    on_field = None
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        boundary = options.get('boundary', '').encode('ascii')
+        if not boundary:
+            raise ValueError('Missing boundary')
+        parser = _FieldTrackingMultiPartParser(
+            self.on_field,
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+        )
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+
+class UploadRequest(Request):
+    form_data_parser_class = _UploadFormDataParser
+    required_fields = {}  # 파일 부분보다 먼저 받아야 하는 텍스트 필드 {이름: 없을 때 메시지} (check_upload_request가 정한다)
+
+    def make_form_data_parser(self):
+        parser = super().make_form_data_parser()
+        parser.on_field = self.__dict__.setdefault('_received_fields', set()).add
+        return parser
+
+    # werkzeug가 파일 부분을 쓸 곳 (업로드 폴더 안이라 저장할 때 같은 파일시스템에서 rename 된다)
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        received = self.__dict__.get('_received_fields', set())
+        for name, message in self.required_fields.items():
+            if name not in received:
+                raise UploadRejected(message)
+        spool = UploadSpool(current_app.config['UPLOAD_FOLDER'])
+        self.__dict__.setdefault('_upload_spools', []).append(spool)
+        return spool
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            for spool in self.__dict__.get('_upload_spools', ()):
+                spool.discard()
+
+
+# 본문을 받기 전에 확인할 수 있는 것 (multipart 형식, 전체 크기)
+# required_fields({이름: 메시지})는 본문을 받는 동안 파일 부분보다 먼저 왔는지 확인한다.
+def check_upload_request(request, required_fields=None):
+    request.required_fields = required_fields or {}
+    if request.mimetype != 'multipart/form-data':
+        raise UploadRejected('multipart/form-data 형식으로 보내주세요.')
+    max_length = current_app.config.get('MAX_CONTENT_LENGTH')
+    if max_length and request.content_length and request.content_length > max_length:
+        raise UploadRejected('파일이 너무 큽니다.', 413)
+
+
+# 헤더만 읽어서 형식/크기/프레임 수 확인 후 {'width', 'height', 'frames'} 반환 (픽셀 디코딩 없음)
+def _check_dimensions(path, sniffed):
+    from PIL import Image as PILImage, UnidentifiedImageError
+
+    config = current_app.config
+    max_pixels = config.get('MAX_IMAGE_PIXELS', 40_000_000)
+    max_side = config.get('MAX_IMAGE_SIDE', 12_000)
+    try:
+        with PILImage.open(path) as image:
+            width, height = image.size
+            image_format = PIL_FORMATS.get(image.format)
+            frames = 1 if image.format in SINGLE_FRAME_FORMATS else getattr(image, 'n_frames', 1)
+    except (UnidentifiedImageError, PILImage.DecompressionBombError, OSError, SyntaxError, EOFError):
+        raise UploadRejected('이미지를 읽을 수 없거나 너무 큽니다.')
+
+    if image_format != sniffed:
+        raise UploadRejected('허용되지 않는 파일 형식입니다.')
+    if width > max_side or height > max_side or width * height > max_pixels:
+        raise UploadRejected('이미지 해상도가 너무 큽니다.')
+    if frames > 1:
+        if frames > config.get('MAX_ANIMATION_FRAMES', 300):
+            raise UploadRejected('움직이는 이미지의 프레임이 너무 많습니다.')
+        if width * height * frames > config.get('MAX_ANIMATION_PIXELS', 100_000_000):
+            raise UploadRejected('움직이는 이미지가 너무 큽니다. 해상도나 프레임 수를 줄여주세요.')
+    return {'width': width, 'height': height, 'frames': frames}
+
+
+# JPEG는 draft로 줄여 디코딩한 미리보기로 지각 해시와 자리 표시 정보를 바로 계산
+# (깨진 파일은 여기서 거절). 다른 형식은 빈 dict를 돌려주고 'analyze' 작업이 계산한다.
+def _quick_analysis(path, sniffed):
+    if sniffed not in QUICK_FORMATS:
+        return {}
+    try:
+        return analyze_preview(*load_preview(path))
+    except (OSError, SyntaxError, ValueError, EOFError):
+        raise UploadRejected('이미지를 읽을 수 없습니다.')
+
+
+# 수신한 업로드 파일 검증 후 저장소에 넣고 (저장 키, 이미지 정보) 반환
+# 이미지 정보: width/height, frames, JPEG는 phash/blurhash/dominant_color까지 (services/analysis.py)
+# width/height는 JPEG는 방향을 반영한 값, 다른 형식은 헤더 값이다 (analyze 작업이 방향을 반영해서 고친다).
+# UploadRequest로 받은 파일은 이미 해시된 임시 파일을 그대로 옮기고,
+# 그 외(다른 request_class)에는 한 번 임시 파일로 받아서 같은 검증을 거친다.
+def ingest_upload(file):
+    spool = file.stream if isinstance(file.stream, UploadSpool) else None
+    if spool is not None:
+        spool.flush()
+        temp_path, content_hash, size, head = spool.path, spool.content_hash, spool.size, spool.head
+    else:
+        temp_path, content_hash, size = storage.spool_to_temp(file.stream, storage.upload_folder())
+        with open(temp_path, 'rb') as temp:
+            head = temp.read(SNIFF_BYTES)
+
+    try:
+        sniffed = sniff_format(head)
+        if sniffed is None:
+            raise UploadRejected('허용되지 않는 파일 형식입니다.')
+        details = _check_dimensions(temp_path, sniffed)
+        details.update(_quick_analysis(temp_path, sniffed))
+        return storage.store_file(temp_path, content_hash, size, sniffed), details
+    except BaseException:
+        if spool is None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
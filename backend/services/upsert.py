@@ -0,0 +1,88 @@
+import importlib
+from functools import wraps
+from sqlalchemy.exc import OperationalError
+from models import db
+
+# DB 종류에 맞는 한 문장짜리 upsert
+# SELECT 후 INSERT/UPDATE 하면 동시 요청이 둘 다 "없음"을 보고 INSERT 하다가 유니크 제약에 걸린다.
+# 충돌 처리를 INSERT 문 안에 넣어 왕복을 줄이고 경쟁 상태를 없앤다.
+#   - MySQL: INSERT ... ON DUPLICATE KEY UPDATE / INSERT IGNORE
+#   - SQLite, PostgreSQL: INSERT ... ON CONFLICT (...) DO UPDATE / DO NOTHING
+# 같은 행을 두고 경쟁하는 쓰기는 그래도 데드락으로 끝날 수 있으므로(MySQL의 갭 락 등)
+# 쓰기 엔드포인트는 retry_on_deadlock으로 트랜잭션 전체를 다시 시도한다.
+
+DEADLOCK_RETRIES = 3
+DEADLOCK_ERRORS = {
+    'mysql': (1213, 1205),  # 데드락, 락 대기 시간 초과
+    'postgresql': ('40P01', '40001'),  # 데드락, 직렬화 실패
+}
+
+
+# 사용 중인 DB의 insert만 불러온다 (sqlalchemy.dialects.<이름>.insert)
+def _insert(model):
+    return importlib.import_module(f'sqlalchemy.dialects.{db.engine.dialect.name}').insert(model)
+
+
+# 행이 있으면 update_values로 갱신, 없으면 추가
+# update_values의 값에 컬럼 표현식(model.count + 1 등)을 쓰면 기존 행 기준으로 계산된다.
+def upsert(model, values, conflict_columns, update_values):
+    statement = _insert(model).values(**values)
+    if db.engine.dialect.name == 'mysql':
+        statement = statement.on_duplicate_key_update(**update_values)
+    else:
+        statement = statement.on_conflict_do_update(index_elements=conflict_columns, set_=update_values)
+    db.session.execute(statement)
+
+
+# 행이 없을 때만 추가. 실제로 추가했으면 True
+# MySQL은 ON DUPLICATE KEY UPDATE의 affected rows가 CLIENT_FOUND_ROWS 설정(SQLAlchemy 기본값)에서
+# 추가/중복을 구분하지 못하므로 INSERT IGNORE를 쓴다. IGNORE는 외래키/길이 오류도 경고로 바꾸므로
+# 호출하는 쪽에서 값 검증과 부모 행 확인을 먼저 해야 한다.
+def insert_if_absent(model, values, conflict_columns):
+    statement = _insert(model).values(**values)
+    if db.engine.dialect.name == 'mysql':
+        statement = statement.prefix_with('IGNORE')
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+    return db.session.execute(statement).rowcount == 1
+
+
+# 여러 행을 한 문장으로 upsert (충돌하면 update_columns를 새 값으로 덮어쓴다)
+def upsert_many(model, rows, conflict_columns, update_columns):
+    if not rows:
+        return
+    statement = _insert(model).values(rows)
+    if db.engine.dialect.name == 'mysql':
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in update_columns})
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: statement.excluded[column] for column in update_columns})
+    db.session.execute(statement)
+
+
+# DB가 데드락/락 충돌로 트랜잭션을 되돌린 경우인지
+def is_deadlock(error):
+    dialect = db.engine.dialect.name
+    orig = error.orig
+    if dialect == 'mysql':
+        return bool(orig.args) and orig.args[0] in DEADLOCK_ERRORS['mysql']
+    if dialect == 'postgresql':
+        return getattr(orig, 'pgcode', None) in DEADLOCK_ERRORS['postgresql']
+    return 'database is locked' in str(orig)
+
+
+# 데드락으로 실패한 쓰기 요청을 롤백 후 처음부터 다시 실행 (DEADLOCK_RETRIES번까지)
+# 요청 안에서 커밋 전에 밖으로 드러나는 일(캐시 무효화, 알림 등)을 하지 않는 엔드포인트에만 쓴다.
+def retry_on_deadlock(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        for attempt in range(DEADLOCK_RETRIES):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if attempt == DEADLOCK_RETRIES - 1 or not is_deadlock(e):
+                    raise
+    return wrapper
@@ -0,0 +1,135 @@
+import atexit
+import threading
+from flask import current_app
+from sqlalchemy import case
+from models import db, Image, ImageView, User, get_kst_now
+from services.upsert import upsert_many
+
+# 이미지 "마지막 확인 시간" 쓰기 지연(write-behind)
+# 확인 요청은 메모리 버퍼에 시간만 기록하고 바로 응답한다. 버퍼는 VIEW_FLUSH_INTERVAL초마다,
+# 또는 VIEW_FLUSH_BATCH_SIZE개가 쌓이면 한 번의 upsert로 image_views에 기록한다.
+# 같은 프로세스의 조회(내 이미지 목록, 알림)는 last_viewed_expression()으로 아직 쓰지 않은 값을 반영한다.
+# 다른 gunicorn 워커는 기록될 때까지(최대 한 주기) 이전 값을 본다.
+# 기록 중인 값은 커밋될 때까지 _in_flight에 남겨 두어 그 사이의 조회도 반영하고, 실패하면 버퍼로 되돌린다.
+# VIEW_FLUSH_INTERVAL이 0이면 버퍼 없이 요청마다 바로 기록한다.
+
+
+class ViewBuffer:
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', 2.0)
+        self.batch_size = app.config.get('VIEW_FLUSH_BATCH_SIZE', 200)
+        self._lock = threading.Lock()
+        self._pending = {}  # (user_id, image_id) -> viewed_at
+        self._in_flight = []  # 기록 중(커밋 전)인 묶음들, 먼저 꺼낸 순서
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+    def record(self, user_id, image_id, viewed_at):
+        with self._lock:
+            self._pending[(user_id, image_id)] = viewed_at
+            size = len(self._pending)
+
+        if self.interval <= 0:
+            self.flush()
+            return
+        if self._flusher is None:
+            self._start()
+        if size >= self.batch_size:
+            self._wakeup.set()
+
+    # 사용자의 아직 기록(커밋)되지 않은 확인 시간 {image_id: viewed_at}
+    # 나중에 꺼낸 묶음, 버퍼 순서로 덮어써서 가장 최근 값을 돌려준다.
+    def pending(self, user_id):
+        with self._lock:
+            result = {}
+            for entries in self._in_flight + [self._pending]:
+                result.update({image_id: viewed_at for (uid, image_id), viewed_at in entries.items() if uid == user_id})
+            return result
+
+    # 버퍼 전체를 한 트랜잭션으로 기록 (app context 안에서 호출)
+    def flush(self):
+        with self._lock:
+            entries, self._pending = self._pending, {}
+            if not entries:
+                return
+            self._in_flight.append(entries)
+
+        try:
+            # 그 사이 삭제된 이미지는 건너뛴다 (외래키 오류로 전체가 실패하지 않도록)
+            image_ids = {image_id for _, image_id in entries}
+            existing = {row[0] for row in db.session.query(Image.id).filter(Image.id.in_(image_ids))}
+            rows = [
+                {'user_id': user_id, 'image_id': image_id, 'last_viewed_at': viewed_at}
+                for (user_id, image_id), viewed_at in entries.items() if image_id in existing
+            ]
+            upsert_many(ImageView, rows, ['image_id', 'user_id'], ['last_viewed_at'])
+
+            # 버퍼에 있는 동안 캐시를 쓰지 않았으므로 기록 후 캐시된 읽지 않은 수를 다시 계산하게 한다
+            user_ids = {row['user_id'] for row in rows}
+            if user_ids:
+                User.query.filter(User.id.in_(user_ids))\
+                    .update({User.unread_comment_count: None}, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"이미지 확인 기록 에러: {str(e)}")
+            # 다음 주기에 다시 시도 (그 사이 들어온 더 최근 값은 유지)
+            with self._lock:
+                self._finish(entries)
+                for key, viewed_at in entries.items():
+                    self._pending.setdefault(key, viewed_at)
+            return
+
+        with self._lock:
+            self._finish(entries)
+
+    # 기록이 끝난 묶음을 _in_flight에서 뺀다 (같은 내용의 다른 묶음과 헷갈리지 않도록 객체로 비교)
+    def _finish(self, entries):
+        self._in_flight = [batch for batch in self._in_flight if batch is not entries]
+
+    def _start(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run, name='image-view-flusher', daemon=True)
+            self._flusher.start()
+        atexit.register(self._flush_in_context)
+
+    def _flush_in_context(self):
+        with self.app.app_context():
+            self.flush()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self._flush_in_context()
+
+
+# 현재 앱의 확인 시간 버퍼
+def get_view_buffer():
+    app = current_app._get_current_object()
+    if 'image_views' not in app.extensions:
+        app.extensions['image_views'] = ViewBuffer(app)
+    return app.extensions['image_views']
+
+
+def record_view(user_id, image_id):
+    get_view_buffer().record(user_id, image_id, get_kst_now().replace(tzinfo=None))
+
+
+def pending_views(user_id):
+    return get_view_buffer().pending(user_id)
+
+
+# 사용자의 이미지별 마지막 확인 시간 SQL 식 (ImageView를 outer join한 쿼리에서 사용)
+# 버퍼에 있는 값이 DB 값보다 항상 최근이므로 그 이미지는 버퍼 값으로 바꿔 넣는다.
+def last_viewed_expression(user_id):
+    pending = pending_views(user_id)
+    if not pending:
+        return ImageView.last_viewed_at
+    return case(
+        *[(Image.id == image_id, viewed_at) for image_id, viewed_at in pending.items()],
+        else_=ImageView.last_viewed_at,
+    )
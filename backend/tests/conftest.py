@@ -0,0 +1,56 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models import db, User, Image
+
+# 테스트마다 임시 SQLite 파일 DB와 업로드 폴더로 앱을 만든다
+# (메모리 DB는 커넥션마다 따로라서 여러 스레드가 같은 데이터를 보지 못한다)
+# 작업은 요청 안에서 바로 처리하고, 응답 캐시는 쓰지 않는다.
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'JOB_BACKEND': 'inline',
+        'CACHE_BACKEND': None,
+        'JWT_SECRET_KEY': 'test-secret-key-with-enough-length-for-hs256',
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# 사용자 생성 후 (id, 인증 헤더) 반환
+@pytest.fixture
+def make_user(app):
+    def make(username):
+        with app.app_context():
+            user = User(username=username, nickname=username, email=f'{username}@example.com', password='x')
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+            return user.id, {'Authorization': f'Bearer {token}'}
+    return make
+
+
+# 파일 없이 이미지 행만 생성 후 id 반환
+@pytest.fixture
+def make_image(app):
+    def make(user_id, title='image'):
+        with app.app_context():
+            image = Image(title=title, image_url=f'{title}.png', user_id=user_id)
+            db.session.add(image)
+            db.session.commit()
+            return image.id
+    return make
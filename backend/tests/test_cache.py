@@ -0,0 +1,90 @@
+import pytest
+from app import create_app
+from models import db, Image
+
+
+@pytest.fixture
+def cached_app(app):
+    app.config['CACHE_BACKEND'] = 'local'
+    return app
+
+
+def reaction_count(response):
+    return response.get_json()['reactions'].get('👍', {}).get('count', 0)
+
+
+# 방금 반응을 남긴 사용자는 캐시를 건너뛰고, 다른 사용자는 새 태그 버전으로 다시 채운 응답을 받는다
+def test_writer_bypasses_cache_until_sticky_period_ends(cached_app, client, make_user, make_image):
+    user_id, headers = make_user('owner')
+    image_id = make_image(user_id)
+    url = f'/api/reactions/image/{image_id}'
+
+    assert client.get(url).headers['X-Cache'] == 'MISS'
+    assert client.get(url).headers['X-Cache'] == 'HIT'
+
+    assert client.post('/api/reactions', json={'emoji': '👍', 'imageId': image_id}, headers=headers).status_code == 201
+
+    own = client.get(url, headers=headers)
+    assert own.headers['X-Cache'] == 'BYPASS' and reaction_count(own) == 1
+    anonymous = client.get(url)
+    assert anonymous.headers['X-Cache'] == 'MISS' and reaction_count(anonymous) == 1
+    assert client.get(url).headers['X-Cache'] == 'HIT'
+
+
+# 복제본이 뒤처져 있어도 캐시를 채우는 응답은 primary에서 읽는다
+def test_cache_is_filled_from_primary(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+        'SQLALCHEMY_BINDS': {'replica_1': f'sqlite:///{tmp_path / "replica.db"}'},
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'JOB_BACKEND': 'inline',
+        'CACHE_BACKEND': 'local',
+        'JWT_SECRET_KEY': 'test-secret-key-with-enough-length-for-hs256',
+    })
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica_1'])  # 스키마만 있고 아직 복제되지 않은 상태
+        from models import User
+        user = User(username='owner', nickname='owner', email='owner@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        image = Image(title='fresh', image_url='fresh.png', user_id=user.id)
+        db.session.add(image)
+        db.session.commit()
+        image_id = image.id
+
+    try:
+        client = app.test_client()
+        first = client.get(f'/api/images/{image_id}')
+        assert first.status_code == 200 and first.headers['X-Cache'] == 'MISS'
+        second = client.get(f'/api/images/{image_id}')
+        assert second.headers['X-Cache'] == 'HIT' and second.get_json() == first.get_json()
+    finally:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        db.metadatas.pop('replica_1', None)  # init_app이 db에 등록한 bind를 다른 테스트의 create_all에서 빼낸다
+
+
+# 댓글은 그 이미지가 들어 있는 목록 페이지만 무효화한다
+def test_comment_invalidates_only_pages_containing_the_image(cached_app, client, make_user, make_image):
+    user_id, headers = make_user('writer')
+    commented = make_image(user_id, 'oldest')
+    for index in range(12):
+        make_image(user_id, f'image-{index}')
+
+    assert [client.get('/api/images?page=1').headers['X-Cache'] for _ in range(2)] == ['MISS', 'HIT']
+    assert [client.get('/api/images?page=2').headers['X-Cache'] for _ in range(2)] == ['MISS', 'HIT']
+    assert client.get(f'/api/images/{commented}').headers['X-Cache'] == 'MISS'
+
+    response = client.post('/api/comments', json={'content': 'hi', 'imageId': commented}, headers=headers)
+    assert response.status_code == 201
+
+    assert client.get('/api/images?page=1').headers['X-Cache'] == 'HIT'
+    page = client.get('/api/images?page=2')
+    assert page.headers['X-Cache'] == 'MISS'
+    assert [image['commentCount'] for image in page.get_json()['images']] == [1]
+    assert client.get('/api/images?page=2').headers['X-Cache'] == 'HIT'
+    detail = client.get(f'/api/images/{commented}')
+    assert detail.headers['X-Cache'] == 'MISS' and detail.get_json()['commentCount'] == 1
@@ -0,0 +1,84 @@
+import threading
+from models import db, Reaction, ImageReactionCount, ImageView, User
+
+THREADS = 8
+
+
+# 요청 함수를 여러 스레드에서 동시에 시작해서 응답 목록 반환
+def run_concurrently(app, requests):
+    barrier = threading.Barrier(len(requests))
+    responses = [None] * len(requests)
+
+    def run(index, request):
+        client = app.test_client()
+        barrier.wait()
+        responses[index] = request(client)
+
+    threads = [threading.Thread(target=run, args=(i, request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def reaction_state(app, image_id, emoji):
+    with app.app_context():
+        rows = Reaction.query.filter_by(image_id=image_id, emoji=emoji).count()
+        count = db.session.query(ImageReactionCount.count)\
+            .filter_by(image_id=image_id, emoji=emoji).scalar() or 0
+        return rows, count
+
+
+def test_concurrent_toggles_from_different_users(app, make_user, make_image):
+    owner_id, _ = make_user('owner')
+    image_id = make_image(owner_id)
+    headers = [make_user(f'user{i}')[1] for i in range(THREADS)]
+
+    responses = run_concurrently(app, [
+        lambda client, h=h: client.post('/api/reactions', json={'emoji': '👍', 'imageId': image_id}, headers=h)
+        for h in headers
+    ])
+
+    assert [r.status_code for r in responses] == [201] * THREADS
+    assert reaction_state(app, image_id, '👍') == (THREADS, THREADS)
+
+
+def test_concurrent_toggles_from_same_user(app, make_user, make_image):
+    user_id, headers = make_user('owner')
+    image_id = make_image(user_id)
+
+    responses = run_concurrently(app, [
+        lambda client: client.post('/api/reactions', json={'emoji': '😂', 'imageId': image_id}, headers=headers)
+        for _ in range(THREADS)
+    ])
+
+    # 짝수 번 토글했으므로 추가와 제거가 반씩이고, 반응과 카운터가 모두 0으로 돌아온다
+    actions = [r.get_json()['action'] for r in responses]
+    assert actions.count('added') == actions.count('removed') == THREADS // 2
+    assert reaction_state(app, image_id, '😂') == (0, 0)
+
+
+def test_concurrent_mark_viewed(app, make_user, make_image):
+    app.config['VIEW_FLUSH_INTERVAL'] = 0  # 버퍼 없이 요청마다 기록
+    owner_id, owner_headers = make_user('owner')
+    _, commenter_headers = make_user('commenter')
+    image_ids = [make_image(owner_id, f'image{i}') for i in range(THREADS // 2)]
+
+    client = app.test_client()
+    for image_id in image_ids:
+        response = client.post('/api/comments', json={'content': 'hi', 'imageId': image_id}, headers=commenter_headers)
+        assert response.status_code == 201
+    assert client.get('/api/notifications/unread-count', headers=owner_headers).get_json()['count'] == len(image_ids)
+
+    # 이미지마다 두 번씩 동시에 확인
+    responses = run_concurrently(app, [
+        lambda client, image_id=image_id: client.post(f'/api/users/images/{image_id}/mark-viewed', headers=owner_headers)
+        for image_id in image_ids * 2
+    ])
+
+    assert [r.status_code for r in responses] == [200] * THREADS
+    with app.app_context():
+        assert ImageView.query.filter_by(user_id=owner_id).count() == len(image_ids)
+        assert db.session.get(User, owner_id).unread_comment_count in (None, 0)
+    assert client.get('/api/notifications/unread-count', headers=owner_headers).get_json()['count'] == 0
@@ -0,0 +1,72 @@
+import io
+import pytest
+from PIL import Image as PILImage
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+
+
+# 촬영 위치와 방향(90도 회전)이 들어 있는 사진
+def photo_with_gps(image_format):
+    exif = PILImage.Exif()
+    exif[ORIENTATION] = 6
+    exif.get_ifd(GPS_IFD)[1] = 'N'
+    buffer = io.BytesIO()
+    PILImage.effect_mandelbrot((120, 80), (-2, -1, 1, 1), 50).convert('RGB')\
+        .save(buffer, image_format, exif=exif.tobytes(), xmp=b'<x:xmpmeta>location</x:xmpmeta>')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('image_format, extension', [('JPEG', 'jpg'), ('PNG', 'png'), ('WEBP', 'webp')])
+def test_original_is_served_without_metadata(client, make_user, image_format, extension):
+    _, headers = make_user('owner')
+    response = client.post('/api/images', headers=headers, content_type='multipart/form-data', data={
+        'title': 'photo', 'image': (io.BytesIO(photo_with_gps(image_format)), f'photo.{extension}'),
+    })
+    assert response.status_code == 201
+    url = response.get_json()['image']['imageUrl']
+
+    for accept in ('*/*', 'image/avif,image/webp,*/*'):
+        served = client.get(url, headers={'Accept': accept})
+        assert served.status_code == 200
+        with PILImage.open(io.BytesIO(served.data)) as image:
+            assert not image.getexif()
+            assert 'xmp' not in image.info
+            assert image.size == (80, 120)  # 방향은 픽셀에 적용된다
+
+
+# 썸네일을 다시 만들다 실패해도 이미 나간 파일은 그대로 두고 임시 파일도 남기지 않는다
+def test_failed_derivative_write_keeps_previous_file(tmp_path, monkeypatch):
+    from services.derivatives import generate_derivatives, derivative_filename
+
+    PILImage.effect_mandelbrot((400, 300), (-2, -1.2, 1, 1.2), 60).convert('RGB').save(tmp_path / 'a.png')
+    assert generate_derivatives(str(tmp_path), 'a.png') == [320, 640]
+    thumbnail = tmp_path / derivative_filename('a.png', 320)
+    previous = thumbnail.read_bytes()
+
+    def broken_save(image, fp, *args, **kwargs):
+        fp.write(b'RIFF')
+        raise OSError('disk full')
+    monkeypatch.setattr(PILImage.Image, 'save', broken_save)
+    with pytest.raises(OSError):
+        generate_derivatives(str(tmp_path), 'a.png')
+
+    assert thumbnail.read_bytes() == previous
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'a.png', derivative_filename('a.png', 320), derivative_filename('a.png', 640)]
+
+
+# 메타데이터를 뺀 GIF 사본은 원본의 반복 정보를 그대로 따른다 (없으면 한 번만 재생)
+@pytest.mark.parametrize('loop', [None, 0, 3])
+def test_clean_gif_keeps_source_loop(tmp_path, loop):
+    from services.transcode import transcode_image, clean_filename
+
+    frames = [PILImage.effect_mandelbrot((120, 80), (-2, -1, 1, 1), 20 + i * 10).convert('P') for i in range(3)]
+    frames[0].save(tmp_path / 'a.gif', save_all=True, append_images=frames[1:], duration=100,
+                   **({} if loop is None else {'loop': loop}))
+
+    transcode_image(str(tmp_path), 'a.gif')
+
+    with PILImage.open(tmp_path / clean_filename('a.gif')) as clean:
+        assert clean.n_frames == 3
+        assert clean.info.get('loop') == loop
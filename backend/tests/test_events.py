@@ -0,0 +1,78 @@
+import json
+from models import db, NotificationEvent
+from services.events import DatabaseEventHub, publish
+
+
+def add_event(event_id, user_id, count):
+    db.session.add(NotificationEvent(id=event_id, user_id=user_id, event_type='unread-count',
+                                     data=json.dumps({'count': count})))
+    db.session.commit()
+
+
+def drain(subscription):
+    events = []
+    while (event := subscription.get(timeout=0)) is not None:
+        events.append(event['id'])
+    return events
+
+
+# 먼저 id를 받은 트랜잭션이 늦게 커밋되어도 다음 조회에서 한 번만 전달한다
+def test_database_hub_delivers_events_committed_out_of_order(app, make_user):
+    user_id, _ = make_user('reader')
+    with app.app_context():
+        hub = DatabaseEventHub(app)
+        subscription = hub.fanout.add(user_id)
+
+        add_event(1, user_id, 1)
+        add_event(3, user_id, 3)
+        hub._poll_once()
+        assert drain(subscription) == ['1', '3']
+
+        add_event(2, user_id, 2)  # id 2가 3보다 늦게 커밋됨
+        hub._poll_once()
+        hub._poll_once()
+        assert drain(subscription) == ['2']
+
+
+# 스트림에서 한 줄씩 읽어 오는 함수 (빈 청크는 건너뛴다)
+def reader(response):
+    chunks = iter(response.response)
+
+    def read():
+        while not (chunk := next(chunks)):
+            pass
+        return chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+    return read
+
+
+def event_id(message):
+    return message.split('\n')[0].removeprefix('id: ')
+
+
+# 재연결하면 Last-Event-ID 이후 이벤트부터 받고, 이벤트가 없으면 heartbeat 주석을 보낸다
+def test_stream_replays_after_last_event_id_and_sends_heartbeats(app, client, make_user):
+    app.config['SSE_HEARTBEAT_SECONDS'] = 0.01
+    user_id, headers = make_user('reader')
+
+    first = client.get('/api/notifications/stream', headers=headers, buffered=False)
+    read = reader(first)
+    assert read() == 'retry: 3000\n\n'
+    assert read().startswith('event: unread-count\n')
+    with app.app_context():
+        publish(user_id, 'unread-count', {'count': 1})
+    last_seen = event_id(read())
+    assert read() == ': ping\n\n'
+    first.close()
+
+    with app.app_context():
+        publish(user_id, 'unread-count', {'count': 2})
+        publish(user_id, 'unread-count', {'count': 3})
+
+    second = client.get('/api/notifications/stream', headers=dict(headers, **{'Last-Event-ID': last_seen}),
+                        buffered=False)
+    read = reader(second)
+    assert read() == 'retry: 3000\n\n'
+    missed = [read(), read()]
+    assert [json.loads(message.split('data: ')[1]) for message in missed] == [{'count': 2}, {'count': 3}]
+    assert read() == ': ping\n\n'
+    second.close()
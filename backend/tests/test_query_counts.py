@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from models import db
+
+
+# 블록 안에서 실행된 SQL 문 목록
+@contextmanager
+def count_statements(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+# 이미지마다 API로 댓글/반응을 하나씩 남긴다 (카운터도 services/counters.py로 갱신된다)
+# {이미지 id: 댓글 작성 시각}
+@pytest.fixture
+def feed(client, make_user, make_image):
+    owner_id, _ = make_user('owner')
+    _, headers = make_user('commenter')
+    comment_times = {}
+    for i in range(22):
+        image_id = make_image(owner_id, f'sunset{i}')
+        response = client.post('/api/comments', json={'content': 'nice', 'imageId': image_id}, headers=headers)
+        comment_times[image_id] = response.get_json()['comment']['createdAt']
+        client.post('/api/reactions', json={'emoji': '👍', 'imageId': image_id}, headers=headers)
+    return comment_times
+
+
+# 목록/상세의 댓글 수와 마지막 댓글 시각이 API로 남긴 댓글과 맞는다
+def assert_comment_counters(images, feed):
+    for image in images:
+        assert image['commentCount'] == 1
+        assert image['lastCommentAt'] == feed[image['id']]
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('/api/images?page=1', 2),  # 페이지 수 계산 + 목록
+    ('/api/images?cursor=', 1),
+    ('/api/images/search?q=sunset', 2),
+])
+def test_feed_statement_counts(app, client, feed, url, expected):
+    with count_statements(app) as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_json()['images']
+    assert_comment_counters(response.get_json()['images'], feed)
+    assert len(statements) == expected, statements
+
+
+def test_detail_statement_count(app, client, feed):
+    with count_statements(app) as statements:
+        response = client.get(f'/api/images/{next(iter(feed))}')
+    assert response.status_code == 200
+    assert_comment_counters([response.get_json()], feed)
+    assert len(statements) == 1, statements
+
+
+# 요청한 id 수와 상관없이 문장 수가 같다 (이미지, 댓글, 반응 요약)
+@pytest.mark.parametrize('count', [2, 22])
+def test_batch_statement_count(app, client, feed, count):
+    ids = ','.join(str(image_id) for image_id in list(feed)[:count])
+    with count_statements(app) as statements:
+        response = client.get(f'/api/images/batch?ids={ids}')
+    assert response.status_code == 200
+    images = response.get_json()['images']
+    assert len(images) == count
+    assert_comment_counters(images, feed)
+    assert all(image['reactions']['counts'] == {'👍': 1} for image in images)
+    assert 3 <= len(statements) <= 4, statements
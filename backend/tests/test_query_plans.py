@@ -0,0 +1,17 @@
+from services.query_plans import explain_hot_queries, hot_queries
+
+
+# 주요 쿼리가 모두 인덱스를 쓰고, 허용된 쿼리 외에는 임시 정렬을 하지 않는다
+def test_hot_queries_use_indexes(app):
+    with app.app_context():
+        results = explain_hot_queries()
+        assert [name for name, _, _ in results] == list(hot_queries())
+
+    problems = {name: problems for name, _, problems in results if problems}
+    assert problems == {}
+
+
+def test_explain_queries_command_succeeds(app):
+    result = app.test_cli_runner().invoke(args=['explain-queries'])
+    assert result.exit_code == 0, result.output
+    assert '[문제]' not in result.output
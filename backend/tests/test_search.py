@@ -0,0 +1,37 @@
+from sqlalchemy.dialects import mysql
+from services.pagination import encode_cursor
+from services.search import mysql_search_query
+
+
+# 커서를 따라가면 모든 결과를 관련도순으로 한 번씩 받는다 (같은 점수는 최신 id 먼저)
+def test_search_pages_cover_every_hit_once(client, make_user, make_image):
+    user_id, _ = make_user('owner')
+    tied = [make_image(user_id, 'sunset beach') for _ in range(4)]
+    make_image(user_id, 'forest')
+    best = make_image(user_id, 'sunset sunset')
+    tied += [make_image(user_id, f'photo {index} of the sunset') for index in range(2)]
+
+    pages, cursor = [], None
+    while True:
+        url = '/api/images/search?q=sunset&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        pages.append([image['id'] for image in body['images']])
+        cursor = body['nextCursor']
+        if cursor is None:
+            break
+
+    ids = [image_id for page in pages for image_id in page]
+    assert all(len(page) == 2 for page in pages[:-1])
+    assert ids == [best] + sorted(tied, reverse=True)
+
+
+# MySQL은 반올림한 점수로 정렬하고 커서도 같은 식과 비교한다 (조건은 인덱스를 쓰는 MATCH 그대로)
+def test_mysql_search_orders_and_filters_by_rounded_score(app):
+    with app.app_context():
+        query = mysql_search_query('sunset', encode_cursor(score=0.1234567, id=10), 12)
+        sql = str(query.statement.compile(dialect=mysql.dialect(), compile_kwargs={'literal_binds': True}))
+
+    rounded = 'round(MATCH (images.title, images.description) AGAINST (\'sunset\' IN NATURAL LANGUAGE MODE), 6)'
+    assert '(MATCH (images.title, images.description) AGAINST (\'sunset\' IN NATURAL LANGUAGE MODE)) > 0' in sql
+    assert f'{rounded} < 0.123457' in sql and f'{rounded} = 0.123457' in sql
+    assert f'ORDER BY {rounded} DESC, images.id DESC' in sql
@@ -0,0 +1,35 @@
+from models import db, Image
+from services import similarity
+
+
+# 평평한 이미지(해시 0)가 많아도 후보 조회는 MAX_CANDIDATES개에서 멈춘다
+def test_similar_candidates_are_capped(app, make_user, monkeypatch):
+    monkeypatch.setattr(similarity, 'MAX_CANDIDATES', 5)
+    owner_id, _ = make_user('owner')
+    with app.app_context():
+        for _ in range(8):
+            image = Image(title='flat', image_url='flat.png', user_id=owner_id)
+            similarity.set_image_hash(image, 0)
+            db.session.add(image)
+        db.session.commit()
+
+        assert len(similarity.similar_candidates_query(0, similarity.SIMILAR_MAX_DISTANCE).all()) == 5
+        assert len(similarity.similar_images(0, similarity.DUPLICATE_MAX_DISTANCE, 10)) == 5
+
+
+# 조각 하나만 같은 먼 해시가 많아도 거리 안의 이미지는 상한에 밀려나지 않는다
+def test_distant_chunk_collisions_do_not_fill_cap(app, make_user, monkeypatch):
+    monkeypatch.setattr(similarity, 'MAX_CANDIDATES', 2)
+    owner_id, _ = make_user('owner')
+    target = 0x0123456789abcdef
+    far = target ^ 0xffffffffffff0000  # phash_0만 같고 48비트가 다르다
+    near = target ^ 0b101  # 2비트 차이
+    with app.app_context():
+        for value in [far] * 5 + [near]:
+            image = Image(title='photo', image_url='photo.png', user_id=owner_id)
+            similarity.set_image_hash(image, value)
+            db.session.add(image)
+        db.session.commit()
+        near_id = Image.query.order_by(Image.id.desc()).first().id
+
+        assert similarity.similar_images(target, similarity.SIMILAR_MAX_DISTANCE, 10) == [(near_id, 2)]
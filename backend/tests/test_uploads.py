@@ -0,0 +1,87 @@
+import io
+from PIL import Image as PILImage
+from models import db, Image
+
+
+def upload(client, headers, image_format, extension, quality=90):
+    buffer = io.BytesIO()
+    picture = PILImage.effect_mandelbrot((160, 120), (-2, -1.2, 1, 1.2), 60).convert('RGB')
+    picture.save(buffer, image_format, **({'quality': quality} if image_format == 'JPEG' else {}))
+    response = client.post('/api/images', headers=headers, content_type='multipart/form-data', data={
+        'title': 'picture', 'image': (io.BytesIO(buffer.getvalue()), f'picture.{extension}'),
+    })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+# JPEG는 요청 안에서 줄여 디코딩해 분석하므로 중복 경고가 응답에 바로 들어간다
+def test_jpeg_duplicates_are_reported_in_response(client, make_user):
+    _, headers = make_user('owner')
+    first = upload(client, headers, 'JPEG', 'jpg')
+    second = upload(client, headers, 'JPEG', 'jpg', quality=50)
+
+    assert 'duplicates' not in first
+    assert [item['id'] for item in second['duplicates']] == [first['image']['id']]
+
+
+# 다른 형식은 요청에서 디코딩하지 않고 analyze 작업으로 계산한다
+def test_png_is_analyzed_by_job(app, client, make_user):
+    _, headers = make_user('owner')
+    uploaded = upload(client, headers, 'PNG', 'png')
+    image_id = uploaded['image']['id']
+
+    assert uploaded['duplicatesPending'] is True
+    status = client.get(f'/api/images/{image_id}/status').get_json()
+    assert status['analysis'] == {'status': 'done', 'error': None}  # inline 백엔드라 이미 끝났다
+    with app.app_context():
+        image = db.session.get(Image, image_id)
+        assert image.phash is not None and image.blurhash and image.dominant_color
+        assert (image.width, image.height) == (160, 120)
+
+
+# MPF 정보가 있는 휴대폰 JPEG(Pillow에서는 MPO)도 움직이지 않는 JPEG 한 장으로 받는다
+def test_mpo_jpeg_is_accepted_as_still_jpeg(app, client, make_user):
+    _, headers = make_user('owner')
+    picture = PILImage.effect_mandelbrot((160, 120), (-2, -1.2, 1, 1.2), 60).convert('RGB')
+    buffer = io.BytesIO()
+    picture.save(buffer, 'MPO', save_all=True, append_images=[picture.resize((80, 60))])
+    assert PILImage.open(io.BytesIO(buffer.getvalue())).format == 'MPO'
+
+    response = client.post('/api/images', headers=headers, content_type='multipart/form-data', data={
+        'title': 'phone', 'image': (io.BytesIO(buffer.getvalue()), 'phone.jpg'),
+    })
+    assert response.status_code == 201
+    image_id = response.get_json()['image']['id']
+    assert response.get_json()['image']['imageUrl'].endswith('.jpg')
+
+    status = client.get(f'/api/images/{image_id}/status').get_json()
+    assert status['status'] == 'done' and status['transcode']['status'] == 'done'
+    with app.app_context():
+        image = db.session.get(Image, image_id)
+        assert image.frame_count == 1 and image.phash is not None
+    served = client.get(response.get_json()['image']['imageUrl'], headers={'Accept': '*/*'})
+    assert PILImage.open(io.BytesIO(served.data)).format == 'JPEG'
+
+
+# 제목 없이 파일부터 오면 파일 부분을 받기 전에 거절한다 (임시 파일을 만들지 않는다)
+def test_upload_without_title_is_rejected_before_spooling(client, make_user, monkeypatch):
+    from services import uploads
+    _, headers = make_user('owner')
+    spools = []
+    monkeypatch.setattr(uploads, 'UploadSpool', lambda folder: spools.append(folder))
+    png = b'\x89PNG\r\n\x1a\n' + b'\0' * 1024
+
+    missing = client.post('/api/images', headers=headers, content_type='multipart/form-data', data={
+        'description': 'no title', 'image': (io.BytesIO(png), 'picture.png'),
+    })
+    boundary = 'file-before-title'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="picture.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n').encode() + png + \
+           f'\r\n--{boundary}\r\nContent-Disposition: form-data; name="title"\r\n\r\nlate\r\n--{boundary}--\r\n'.encode()
+    late = client.post('/api/images', headers=headers, data=body,
+                       content_type=f'multipart/form-data; boundary={boundary}')
+
+    for response in (missing, late):
+        assert response.status_code == 400
+        assert response.get_json()['message'] == '제목을 입력해주세요.'
+    assert spools == []
@@ -0,0 +1,58 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import ImageView
+from services.views import get_view_buffer
+
+VIEWED_AT = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def buffer(app):
+    app.config['VIEW_FLUSH_INTERVAL'] = 60  # 테스트에서 직접 flush
+    with app.app_context():
+        yield get_view_buffer()
+
+
+# 커밋 직전에 실행할 함수를 걸어 둔다
+@pytest.fixture
+def before_commit():
+    listeners = []
+
+    def listen(callback):
+        listener = lambda session: callback()
+        event.listen(Session, 'before_commit', listener)
+        listeners.append(listener)
+
+    yield listen
+    for listener in listeners:
+        event.remove(Session, 'before_commit', listener)
+
+
+def test_pending_includes_entries_being_flushed(app, buffer, make_user, make_image, before_commit):
+    user_id, _ = make_user('owner')
+    image_id = make_image(user_id)
+    buffer.record(user_id, image_id, VIEWED_AT)
+
+    seen = []
+    before_commit(lambda: seen.append(buffer.pending(user_id)))
+    buffer.flush()
+
+    assert seen == [{image_id: VIEWED_AT}]
+    assert buffer.pending(user_id) == {}
+    assert ImageView.query.filter_by(user_id=user_id, image_id=image_id).count() == 1
+
+
+def test_failed_flush_keeps_entries_pending(app, buffer, make_user, make_image, before_commit):
+    user_id, _ = make_user('owner')
+    image_id = make_image(user_id)
+    buffer.record(user_id, image_id, VIEWED_AT)
+
+    def fail():
+        raise RuntimeError('commit failed')
+    before_commit(fail)
+    buffer.flush()
+
+    assert buffer.pending(user_id) == {image_id: VIEWED_AT}
+    assert ImageView.query.count() == 0